@@ -0,0 +1,68 @@
+from collections import namedtuple
+import os
+import random
+
+
+TEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'test')
+
+Instance = namedtuple('Instance', ['family', 'size', 'files', 'program', 'constants'])
+
+
+def yale(size, actions=0):
+    program = ['inertial(loaded).',
+               'inertial(alive).',
+               'action(load).',
+               'action(pull_trigger).',
+               'executable(pull_trigger,T) :- stepless(T).',
+               'executable(load,T) :- -holds(loaded,T), stepless(T).',
+               '-holds(alive,T+1) :- occurs(pull_trigger,T), holds(loaded,T), stepless(T).',
+               '-holds(loaded,T+1) :- occurs(pull_trigger,T), stepless(T).',
+               'holds(loaded,T+1) :- occurs(load,T), stepless(T).',
+               'holds(alive,0).',
+               '-holds(loaded,0).']
+    for action in range(actions):
+        program.append(f'action(wait{action}).')
+        program.append(f'executable(wait{action},T) :- stepless(T).')
+
+    return Instance('yale', size, [os.path.join(TEST_PATH, 'yale', 'yale.lp')],
+                    '\n'.join(program), [('length', str(size))])
+
+
+def eligible(size, seed=0):
+    generator = random.Random(seed)
+    program = []
+    for student in range(size):
+        name = f's{student}'
+        program.append(f'student({name}).')
+        gpa = generator.choice(['highGPA', 'fairGPA', '-highGPA', '-fairGPA', None])
+        if gpa is not None:
+            program.append(f'{gpa}({name}).')
+        if gpa in ('-highGPA', '-fairGPA') and generator.random() < 0.5:
+            program.append(f'{"-fairGPA" if gpa == "-highGPA" else "-highGPA"}({name}).')
+        if generator.random() < 0.5:
+            program.append(f'minority({name}).')
+
+    return Instance('eligible', size, [os.path.join(TEST_PATH, 'eligible', 'eligible.lp')],
+                    '\n'.join(program), [])
+
+
+def paths(size, degree=2, seed=0):
+    generator = random.Random(seed)
+    edges = {(vertex, vertex + 1) for vertex in range(size - 1)}
+    for vertex in range(size):
+        for target in generator.sample(range(size), min(degree, size)):
+            if target != vertex:
+                edges.add((vertex, target))
+    program = [f'edge({source},{target}).' for source, target in sorted(edges)]
+    program.append(f'start(0). goal({size - 1}).')
+
+    return Instance('paths', size, [os.path.join(TEST_PATH, 'paths', 'paths.lp'),
+                                    os.path.join(TEST_PATH, 'paths', 'critical.lp')],
+                    '\n'.join(program), [])
+
+
+FAMILIES = {
+    'yale': yale,
+    'eligible': eligible,
+    'paths': paths
+}
@@ -0,0 +1,175 @@
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+from time import perf_counter as timer
+import eclingo.main as eclingo
+from benchmarks.generators import FAMILIES
+
+
+OPTIMIZATIONS = [0, 1, 2, 3, 4, 5]
+
+SIZES = {
+    'yale': ['2', '3', '4', '3x2', '3x4'],
+    'eligible': ['10', '20', '40'],
+    'paths': ['5', '10', '15']
+}
+
+
+def run(instance, semantics, optimization, max_models, heuristic=None):
+    start = timer()
+    control = eclingo.Control(max_models=max_models, semantics=semantics,
+                              optimization=optimization, heuristic=heuristic)
+    for file_path in instance.files:
+        control.load(file_path)
+    control.add(instance.program)
+    for name, value in instance.constants:
+        control.add_const(name, value)
+    loaded = timer()
+
+    control.parse()
+    parsed = timer()
+
+    models = sum(1 for _ in control.solve())
+    solved = timer()
+    statistics = control.statistics
+    counters = statistics['counters']
+
+    return {
+        'family': instance.family,
+        'semantics': 'k15' if semantics else 'g94',
+        'optimization': optimization,
+        'heuristic': heuristic,
+        'epistemic_atoms': counters.get('epistemic_atoms', 0),
+        'candidates': counters.get('candidates', 0),
+        'first_candidates': counters.get('candidates_to_first_world_view'),
+        'models': models,
+        'load': loaded - start,
+        'parse': parsed - loaded,
+        'solve': solved - parsed,
+        'total': solved - start,
+        'phases': {name: times['wall'] for name, times in statistics['phases'].items()}
+    }
+
+
+def _run_isolated(arguments):
+    # a fresh process per run, as the peak resident set size only grows within a process
+    result = run(*arguments)
+    result['memory'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def run_all(families, sizes, optimizations, max_models, repeat, heuristic=None, memory=False):
+    pool = multiprocessing.Pool(1, maxtasksperchild=1) if memory else None
+    try:
+        return _run_all(families, sizes, optimizations, max_models, repeat, heuristic, pool)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def _run_all(families, sizes, optimizations, max_models, repeat, heuristic, pool):
+    results = []
+    for family in families:
+        for size in sizes.get(family, SIZES[family]):
+            instance = FAMILIES[family](*[int(value) for value in size.split('x')])
+            for semantics in [False, True]:
+                for optimization in optimizations:
+                    arguments = (instance, semantics, optimization, max_models, heuristic)
+                    if pool is None:
+                        runs = [run(*arguments) for _ in range(repeat)]
+                    else:
+                        runs = [pool.apply(_run_isolated, (arguments,)) for _ in range(repeat)]
+                    result = min(runs, key=lambda result: result['total'])
+                    result['size'] = size
+                    print(f'{family:>10} {size:>6} {result["semantics"]} '
+                          f'op{optimization} {result["total"]:.6f} s', file=sys.stderr)
+                    results.append(result)
+    return results
+
+
+def compare(results, baseline, threshold, minimum):
+    def key(result):
+        return (result['family'], result['size'], result['semantics'], result['optimization'],
+                result.get('heuristic'))
+
+    def slower(time, reference_time):
+        return time > reference_time * threshold and time - reference_time > minimum
+
+    baseline = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline.get(key(result))
+        if reference is None:
+            continue
+        if result['models'] != reference['models']:
+            regressions.append((result, 'models', reference['models'], result['models']))
+            continue
+        if slower(result['total'], reference['total']):
+            regressions.append((result, 'total', reference['total'], result['total']))
+        reference_phases = reference.get('phases', {})
+        for name, time in sorted(result.get('phases', {}).items()):
+            if name in reference_phases and slower(time, reference_phases[name]):
+                regressions.append((result, f'phase {name}', reference_phases[name], time))
+        if 'memory' in result and 'memory' in reference \
+                and result['memory'] > reference['memory'] * threshold:
+            regressions.append((result, 'memory', reference['memory'], result['memory']))
+    return regressions
+
+
+def main():
+    argparser = argparse.ArgumentParser(prog='benchmarks.runner')
+    argparser.add_argument('-f', '--family', action='append', choices=sorted(FAMILIES),
+                           help='instance families to run (default: all)')
+    argparser.add_argument('-s', '--size', action='append', default=[],
+                           help='sizes of a family (using \'<family>=<size>,<size>\' format, '
+                                'where a size may give further parameters as \'<size>x<n>\')')
+    argparser.add_argument('-op', '--optimization', type=int, action='append',
+                           help='optimization levels to run (default: all)')
+    argparser.add_argument('-n', '--models', type=int, default=0,
+                           help='maximum number of models to compute (0 computes all models)')
+    argparser.add_argument('--heuristic', choices=['false', 'brave'],
+                           help='heuristic guiding the candidate generation')
+    argparser.add_argument('-r', '--repeat', type=int, default=1,
+                           help='number of runs per configuration (the fastest is kept)')
+    argparser.add_argument('--memory', action='store_true',
+                           help='run each configuration in a fresh process and record its peak '
+                                'resident set size in KiB')
+    argparser.add_argument('-o', '--output', type=str, help='path to write the results to')
+    argparser.add_argument('-b', '--baseline', type=str, help='path to baseline results')
+    argparser.add_argument('-t', '--threshold', type=float, default=1.2,
+                           help='slowdown ratio against the baseline reported as regression')
+    argparser.add_argument('-m', '--minimum', type=float, default=0.01,
+                           help='slowdown in seconds below which no regression is reported')
+    args = argparser.parse_args()
+
+    sizes = {}
+    for size in args.size:
+        family, values = size.split('=')
+        sizes[family] = values.split(',')
+
+    results = run_all(args.family or sorted(FAMILIES), sizes,
+                      args.optimization or OPTIMIZATIONS, args.models, args.repeat,
+                      args.heuristic, args.memory)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'version': eclingo.__version__, 'results': results}, output, indent=1)
+    else:
+        json.dump({'version': eclingo.__version__, 'results': results}, sys.stdout, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline:
+            regressions = compare(results, json.load(baseline)['results'],
+                                  args.threshold, args.minimum)
+        for result, reason, before, after in regressions:
+            print(f'REGRESSION ({reason}) {result["family"]} {result["size"]} '
+                  f'{result["semantics"]} op{result["optimization"]}: '
+                  f'{before} -> {after}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
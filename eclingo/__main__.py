@@ -1,30 +1,99 @@
 import argparse
+import json
+import sys
 from time import perf_counter as timer
 import eclingo.main as eclingo
+from eclingo.batch import batch
+from eclingo.server import server
+from eclingo.utils.cache import GroundCache, ResultCache
+from eclingo.utils.output import WRITERS
+
+
+_POLL_INTERVAL = 0.1
 
 
 def main():
-    print(f'eclingo version {eclingo.__version__}')
+    if sys.argv[1:2] == ['serve']:
+        server.main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['batch']:
+        batch.main(sys.argv[2:])
+        return
 
     argparser = argparse.ArgumentParser(prog='eclingo')
     argparser.add_argument('-n', '--models', type=int,
-                           help='maximum number of models to compute (0 computes all models)',
-                           default=1)
+                           help='maximum number of models to compute (0 computes all models, '
+                                'default 1, or 0 with --count)')
     argparser.add_argument('-k', '--k15', action='store_true',
                            help='computes world views under K15 semantics')
     argparser.add_argument('-op', '--optimization', type=int,
-                           help='number of optimization to use (0 for no optimizations)',
+                           help='optimization level, each one including the previous ones: '
+                                '0 none, 1 and 2 discard candidates whose subjective literals '
+                                'contradict their objective atoms, 3 fixes the subjective literals '
+                                'decided by the well-founded model (default), 4 learns nogoods '
+                                'from rejected candidates, 5 also discards subjective literals '
+                                'that the brave or cautious consequences rule out',
                            default=eclingo.__optimization__)
+    argparser.add_argument('-j', '--workers', type=int,
+                           help='number of processes used to test world view candidates',
+                           default=1)
+    argparser.add_argument('--unordered', action='store_true',
+                           help='reports world views as their tests complete (with -j)')
+    argparser.add_argument('--heuristic', choices=['false', 'brave'],
+                           help='guides the candidate generation: prefers epistemic literals to '
+                                'be false, or to agree with the brave consequences of the program')
+    argparser.add_argument('--split', action='store_true',
+                           help='solves independent components of the program separately')
+    argparser.add_argument('--propagate', nargs='?', const=0.5, type=float,
+                           help='checks partial candidates once the given fraction of '
+                                'epistemic literals is decided (default 0.5)')
     argparser.add_argument('-c', '--const', action='append',
                            help='adds a constant to the program (using \'<name>=<term>\' format)')
+    argparser.add_argument('--time-limit', type=float,
+                           help='stops solving after the given number of seconds')
+    argparser.add_argument('--memory-limit', type=int,
+                           help='stops solving once the process uses the given megabytes')
+    argparser.add_argument('--cache', type=str,
+                           help='path to a directory where computed world views are cached')
+    argparser.add_argument('--ground-cache', type=str,
+                           help='path to a directory where ground programs are cached')
+    argparser.add_argument('--cache-size', type=int, default=256,
+                           help='maximum size of each cache in megabytes')
+    argparser.add_argument('--outf', choices=sorted(WRITERS), default='text',
+                           help='format of the world views written to the standard output')
+    counting = argparser.add_mutually_exclusive_group()
+    counting.add_argument('--count', action='store_true',
+                          help='prints the number of world views instead of the world views')
+    counting.add_argument('--sat-only', action='store_true',
+                          help='only decides whether a world view exists')
+    argparser.add_argument('--stats', nargs='?', const='text', choices=['text', 'json'],
+                           help='prints statistics of every phase (as text or json)')
     argparser.add_argument('input_files', nargs='+', type=str, help='path to input files')
     args = argparser.parse_args()
 
+    writer = WRITERS[args.outf](sys.stdout, eclingo.__version__)
+    writer.begin()
     start = timer()
 
-    eclingo_control = eclingo.Control(max_models=args.models,
+    max_models = args.models
+    if args.sat_only:
+        max_models = 1
+    elif max_models is None:
+        max_models = 0 if args.count else 1
+
+    eclingo_control = eclingo.Control(max_models=max_models,
                                       semantics=args.k15,
-                                      optimization=args.optimization)
+                                      optimization=args.optimization,
+                                      workers=args.workers,
+                                      ordered=not args.unordered,
+                                      heuristic=args.heuristic,
+                                      split=args.split,
+                                      propagator_threshold=args.propagate,
+                                      cache=ResultCache(args.cache, args.cache_size << 20)
+                                      if args.cache else None,
+                                      ground_cache=GroundCache(args.ground_cache,
+                                                               args.cache_size << 20)
+                                      if args.ground_cache else None)
 
     for file_path in args.input_files:
         eclingo_control.load(file_path)
@@ -34,15 +103,61 @@ def main():
             eclingo_control.add_const(name, term)
 
     eclingo_control.parse()
-    print('Solving...')
-    for model in eclingo_control.solve():
-        print(f'Answer: {eclingo_control.models}\n{model}')
+    writer.solving()
+    if args.count or args.sat_only:
+        handle = eclingo_control.count_async()
+    else:
+        handle = eclingo_control.solve_async(
+            on_model=lambda model: writer.model(eclingo_control.models, model,
+                                                eclingo_control.cost))
+    while not handle.wait(_POLL_INTERVAL):
+        if exceeded(start, args.time_limit, args.memory_limit):
+            handle.cancel()
+    status = handle.get()
 
     end = timer()
 
-    print('SATISFIABLE\n') if eclingo_control.models else print('UNSATISFIABLE\n')
+    if args.count:
+        writer.count(eclingo_control.models)
+    writer.end(status, eclingo_control.models, end - start)
+
+    if args.stats == 'json':
+        print(json.dumps({'statistics': eclingo_control.statistics}))
+    elif args.stats:
+        print_statistics(eclingo_control.statistics)
+
+
+def exceeded(start, time_limit, memory_limit):
+    if time_limit is not None and timer() - start > time_limit:
+        return True
+    if memory_limit is not None:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss > memory_limit * 1024
+    return False
+
+
+def print_statistics(statistics):
+    print('\nPhase                Wall (s)      CPU (s)')
+    for name, times in statistics['phases'].items():
+        print(f'{name:<16} {times["wall"]:>12.6f} {times["cpu"]:>12.6f}')
+
+    print()
+    for name, value in sorted(statistics['counters'].items()):
+        print(f'{name:<24}: {value}')
 
-    print(f'Elapsed time: {(end-start):.6f} s')
+    for name, clingo_statistics in statistics['clingo'].items():
+        summary = clingo_statistics.get('summary', {})
+        problem = clingo_statistics.get('problem', {}).get('lp', {})
+        solvers = clingo_statistics.get('solving', {}).get('solvers', {})
+        print(f'\n{name.capitalize()}')
+        print(f'  Calls                 : {summary.get("call", 0) + 1:.0f}')
+        print(f'  Time                  : {summary.get("times", {}).get("total", 0):.6f} s')
+        print(f'  Models                : '
+              f'{summary.get("models", {}).get("enumerated", 0):.0f}')
+        print(f'  Choices               : {solvers.get("choices", 0):.0f}')
+        print(f'  Conflicts             : {solvers.get("conflicts", 0):.0f}')
+        print(f'  Atoms                 : {problem.get("atoms", 0):.0f}')
+        print(f'  Rules                 : {problem.get("rules", 0):.0f}')
 
 
 if __name__ == "__main__":
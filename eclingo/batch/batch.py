@@ -0,0 +1,72 @@
+import argparse
+import json
+import multiprocessing
+import sys
+from time import perf_counter as timer
+import eclingo.main as eclingo
+
+
+def _init_worker(memory_limit):
+    if memory_limit is not None:
+        import resource
+        limit = memory_limit << 20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def solve_instance(task):
+    instance, kb_files, constants, semantics, optimization, max_models, time_limit = task
+    start = timer()
+    response = {'instance': instance}
+    try:
+        control = eclingo.Control(max_models=max_models, semantics=semantics,
+                                  optimization=optimization)
+        for file_path in [*kb_files, instance]:
+            control.load(file_path)
+        for constant in constants:
+            name, term = constant.split('=')
+            control.add_const(name, term)
+        control.parse()
+
+        with control.solve_async() as handle:
+            if not handle.wait(time_limit):
+                handle.cancel()
+            response['result'] = handle.get()
+            response['models'] = [[str(symbol) for symbol in model.symbols] for model in handle]
+    except MemoryError:
+        response['error'] = 'memory limit exceeded'
+    except (ValueError, RuntimeError, OSError) as error:
+        response['error'] = str(error)
+    response['time'] = timer() - start
+    return response
+
+
+def main(arguments=None):
+    argparser = argparse.ArgumentParser(prog='eclingo batch')
+    argparser.add_argument('-n', '--models', type=int,
+                           help='maximum number of models to compute (0 computes all models)',
+                           default=1)
+    argparser.add_argument('-k', '--k15', action='store_true',
+                           help='computes world views under K15 semantics')
+    argparser.add_argument('-op', '--optimization', type=int,
+                           help='optimization level (0 to 5, see eclingo --help)',
+                           default=eclingo.__optimization__)
+    argparser.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(),
+                           help='number of processes solving instances')
+    argparser.add_argument('--kb', action='append', default=[],
+                           help='path to a knowledge base shared by every instance')
+    argparser.add_argument('-c', '--const', action='append', default=[],
+                           help='adds a constant to the program (using \'<name>=<term>\' format)')
+    argparser.add_argument('--time-limit', type=float,
+                           help='stops solving an instance after the given number of seconds')
+    argparser.add_argument('--memory-limit', type=int,
+                           help='limits the memory of each worker to the given megabytes')
+    argparser.add_argument('instances', nargs='+', type=str, help='path to instance files')
+    args = argparser.parse_args(arguments)
+
+    tasks = [(instance, args.kb, args.const, args.k15, args.optimization, args.models,
+              args.time_limit) for instance in args.instances]
+    with multiprocessing.Pool(args.workers, initializer=_init_worker,
+                              initargs=(args.memory_limit,)) as pool:
+        for response in pool.imap_unordered(solve_instance, tasks):
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
@@ -1,66 +1,336 @@
+import hashlib
+import json
 import clingo
 from eclingo.preprocessor.preprocessor import G94Preprocessor, K15Preprocessor
 from eclingo.parser.parser import Parser
 from eclingo.solver.solver import Solver
+from eclingo.solver.parallel import ParallelSolver
+from eclingo.solver.split import SplitSolver
+from eclingo.solver.handle import SolveHandle
+from eclingo.solver.propagator import EpistemicPropagator
 from eclingo.postprocessor.postprocessor import Postprocessor
 from eclingo.utils.logger import logger, silent_logger
+from eclingo.utils.statistics import Statistics
 
 
 __version__ = '0.2.0'
 __optimization__ = 3
 
+_TRUTH_VALUES = {True: clingo.TruthValue.True_,
+                 False: clingo.TruthValue.False_,
+                 None: clingo.TruthValue.Free}
+
 
 class Control:
 
-    def __init__(self, max_models=1, semantics=False, optimization=__optimization__):
+    def __init__(self, max_models=1, semantics=False, optimization=__optimization__,
+                 workers=1, ordered=True, heuristic=None, cache=None, split=False,
+                 propagator_threshold=None, ground_cache=None):
         self.models = 0
+        self.cost = None
+        self.optimal = False
         self.max_models = max_models
         self.semantics = semantics
         self.optimization = optimization
-        self._candidates_gen = clingo.Control(['0', '--project'], logger=silent_logger)
+        self.workers = workers
+        self.ordered = ordered
+        self.heuristic = heuristic
+        self.split = split
+        self.propagator_threshold = propagator_threshold
+        self._gen_arguments = ['0', '--project']
+        if heuristic is not None:
+            self._gen_arguments.append('--heuristic=Domain')
+        self._candidates_gen = clingo.Control(self._gen_arguments, logger=silent_logger)
         self._candidates_test = clingo.Control(['0'], logger=logger)
         self._epistemic_atoms = {}
+        self._epistemic_index = []
+        self._epistemic_dependencies = None
         self._predicates = []
         self._show_signatures = set()
+        self._show_atoms = []
+        self._components = []
+        self._rest_show_atoms = []
+        self._cost_atoms = []
+        self._sources = []
+        self._externals = {}
+        self._statistics = Statistics()
+        self._solver = None
+        self.interrupted = False
+        self._cache = cache
+        self._ground_cache = ground_cache
+        self._digest = hashlib.sha256() if cache is not None else None
+        self._source_digest = hashlib.sha256() if ground_cache is not None else None
+        self._parsed = False
 
     def add(self, program):
-        if self.semantics:
-            preprocessor = K15Preprocessor(self._candidates_gen, self._candidates_test,
-                                           self.optimization)
+        self._sources.append(('program', program))
+        if self._ground_cache is not None:
+            self._source_digest.update(b'program\0' + program.encode() + b'\0')
         else:
-            preprocessor = G94Preprocessor(self._candidates_gen, self._candidates_test,
-                                           self.optimization)
+            self._preprocess('program', program)
+
+    def _preprocess(self, kind, source):
+        preprocessor = self._get_preprocessor()
+        with self._statistics.phase('preprocessing'):
+            if kind == 'file':
+                preprocessor.preprocess_file(source)
+            else:
+                preprocessor.preprocess(source)
+        self._update(preprocessor)
+
+    def _get_preprocessor(self):
+        if self.semantics:
+            return K15Preprocessor(self._candidates_gen, self.optimization, self._digest)
+        return G94Preprocessor(self._candidates_gen, self.optimization, self._digest)
 
-        preprocessor.preprocess(program)
+    def _update(self, preprocessor):
         self._predicates.extend(preprocessor.predicates)
         self._show_signatures.update(preprocessor.show_signatures)
 
-        del preprocessor
-
     def add_const(self, name, value):
         self.add(f'#const {name}={value}.')
 
     def load(self, input_path):
-        with open(input_path, 'r') as program:
-            self.add(program.read())
+        self._sources.append(('file', input_path))
+        if self._ground_cache is not None:
+            self._source_digest.update(b'file\0')
+            with open(input_path, 'rb') as input_file:
+                for chunk in iter(lambda: input_file.read(1 << 20), b''):
+                    self._source_digest.update(chunk)
+            self._source_digest.update(b'\0')
+        else:
+            self._preprocess('file', input_path)
 
     def parse(self):
+        if self._cache is None:
+            self._parse()
+
+    def _parse(self):
+        if self._parsed:
+            return
+        self._parsed = True
+
+        key = restore = None
+        if self._ground_cache is not None:
+            key = self._get_ground_cache_key()
+            restore = self._ground_cache.get(key)
+            if restore is None:
+                for kind, source in self._sources:
+                    self._preprocess(kind, source)
+            else:
+                self._statistics.increment('ground_cache_hits')
+                self._show_signatures.update(tuple(signature)
+                                             for signature in restore[2]['show_signatures'])
+
         parser = Parser(self._candidates_gen, self._candidates_test,
-                        self._predicates, self.optimization)
+                        self._predicates, self.optimization, self._show_signatures,
+                        self._statistics, self.heuristic,
+                        self._gen_arguments if self.split else None,
+                        restore, key is not None and restore is None)
 
         parser.parse()
+        if key is not None and restore is None:
+            parser.ground_state['show_signatures'] = sorted(self._show_signatures)
+            self._ground_cache.put(key, parser.ground_program, parser.ground_symbols,
+                                   parser.ground_state)
         self._epistemic_atoms.update(parser.epistemic_atoms)
+        self._epistemic_index.extend(parser.epistemic_index)
+        self._show_atoms.extend(parser.show_atoms)
+        self._components.extend(parser.components)
+        self._rest_show_atoms.extend(parser.rest_show_atoms)
+        self._cost_atoms.extend(parser.cost_atoms)
+        if self.optimization > 3:
+            self._epistemic_dependencies = parser.epistemic_dependencies
+        if self.propagator_threshold is not None:
+            self._candidates_gen.register_propagator(
+                EpistemicPropagator(self._candidates_test, self._epistemic_index,
+                                    self.propagator_threshold, self._statistics))
 
         del parser
 
+    def assign_external(self, atom, truth):
+        self._parse()
+        for candidates_gen in self._get_generators(atom):
+            candidates_gen.assign_external(atom, truth)
+        self._set_test_external(atom, _TRUTH_VALUES[truth])
+        self._externals[atom] = truth
+
+    def release_external(self, atom):
+        self._parse()
+        for candidates_gen in self._get_generators(atom):
+            candidates_gen.release_external(atom)
+        self._set_test_external(atom, clingo.TruthValue.Release)
+        self._externals.pop(atom, None)
+
+    def is_external(self, atom):
+        self._parse()
+        external = self._candidates_gen.symbolic_atoms[atom]
+        return external is not None and external.is_external
+
+    def _get_generators(self, atom):
+        yield self._candidates_gen
+        for candidates_gen, _, _ in self._components:
+            if candidates_gen.symbolic_atoms[atom] is not None:
+                yield candidates_gen
+
+    def _set_test_external(self, atom, value):
+        external = self._candidates_test.symbolic_atoms[atom]
+        if external is not None:
+            with self._candidates_test.backend() as backend:
+                backend.add_external(external.literal, value)
+
     def solve(self):
-        solver = Solver(self._candidates_gen, self._candidates_test,
-                        self._epistemic_atoms, self.max_models)
-        postprocessor = Postprocessor(self._candidates_test, self._show_signatures)
+        self.interrupted = False
+        return self._solve()
+
+    def solve_async(self, on_model=None):
+        self.interrupted = False
+        return SolveHandle(self, self._solve(), on_model)
+
+    def interrupt(self):
+        self.interrupted = True
+        if self._solver is not None:
+            self._solver.interrupt()
+
+    def _solve(self):
+        self.models = 0
+        self.cost = None
+        self.optimal = False
+        key = self._get_cache_key()
+        if key is not None:
+            models = self._cache.get(key)
+            if models is not None:
+                self._statistics.increment('cache_hits')
+                for model in models:
+                    self.models += 1
+                    yield model
+                return
 
-        for model, assumptions in solver.solve():
-            self.models += 1
-            yield postprocessor.postprocess(model, assumptions)
+        models = []
+        for model in self._enumerate():
+            if key is not None:
+                models.append(model)
+            yield model
+
+        if key is not None and not self.interrupted and not self._cost_atoms:
+            self._cache.put(key, models)
+
+    def _get_cache_key(self):
+        if self._cache is None or self._externals:
+            return None
+        options = [__version__, self._get_program_digest(), self.semantics, self.optimization,
+                   self.max_models, self.heuristic]
+        return hashlib.sha256(json.dumps(options).encode()).hexdigest()
+
+    def _get_ground_cache_key(self):
+        options = [__version__, self._source_digest.hexdigest(), self.semantics,
+                   self.optimization, self.heuristic]
+        return hashlib.sha256(json.dumps(options).encode()).hexdigest()
+
+    def _get_program_digest(self):
+        if self._source_digest is not None:
+            return self._source_digest.hexdigest()
+        return self._digest.hexdigest()
+
+    def _enumerate(self):
+        self._parse()
+        solver = self._get_solver(self._show_atoms if self._show_signatures else None,
+                                  self._cost_atoms)
+        postprocessor = Postprocessor(self._show_signatures)
+        self._solver = solver
+        if self.interrupted:
+            solver.interrupt()
+
+        try:
+            for model, assumptions, consequences in solver.solve():
+                self.models += 1
+                self.cost = solver.cost
+                with self._statistics.phase('postprocessing'):
+                    model = postprocessor.postprocess(model, assumptions, consequences)
+                yield model
+            self.optimal = solver.optimal
+        finally:
+            self._solver = None
 
         del solver
         del postprocessor
+
+    def count(self):
+        self.interrupted = False
+        return self._count()
+
+    def count_async(self):
+        self.interrupted = False
+        return SolveHandle(self, self._count_models())
+
+    def _count_models(self):
+        # a handle consumes models, the count is kept in self.models
+        self._count()
+        yield from ()
+
+    def _count(self):
+        self.models = 0
+        self.optimal = False
+        key = self._get_cache_key()
+        if key is not None:
+            models = self._cache.get(key)
+            if models is not None:
+                self._statistics.increment('cache_hits')
+                self.models = len(models)
+                return self.models
+
+        self._parse()
+        solver = self._get_solver(None)
+        self._solver = solver
+        if self.interrupted:
+            solver.interrupt()
+
+        try:
+            self.models = solver.count()
+        finally:
+            self._solver = None
+        return self.models
+
+    def _get_solver(self, show_atoms, cost_atoms=None):
+        if cost_atoms:
+            return Solver(self._candidates_gen, self._candidates_test,
+                          self._epistemic_index, self.max_models,
+                          self._epistemic_dependencies, show_atoms, self._statistics, cost_atoms)
+        if self.split:
+            return SplitSolver(self._candidates_test, self._components, self._rest_show_atoms,
+                               self.max_models, self._epistemic_dependencies, show_atoms,
+                               self._statistics)
+        if self.workers > 1:
+            return ParallelSolver(self._candidates_gen, self._candidates_test,
+                                  self._epistemic_index, self.max_models,
+                                  self._epistemic_dependencies, show_atoms,
+                                  self._statistics, self.workers, self.ordered,
+                                  (self._sources, self.semantics, self.optimization,
+                                   [(str(atom), truth)
+                                    for atom, truth in self._externals.items()],
+                                   [str(epistemic.symbol) for epistemic in self._epistemic_index],
+                                   [str(symbol) for symbol, _ in show_atoms]
+                                   if show_atoms is not None else None))
+        return Solver(self._candidates_gen, self._candidates_test,
+                      self._epistemic_index, self.max_models,
+                      self._epistemic_dependencies, show_atoms, self._statistics)
+
+    def get_test_solver(self, epistemic_index, show_atoms=None):
+        self._parse()
+        return Solver(self._candidates_gen, self._candidates_test, epistemic_index, 0,
+                      show_atoms=show_atoms)
+
+    @property
+    def epistemic_index(self):
+        return self._epistemic_index
+
+    @property
+    def show_atoms(self):
+        return self._show_atoms
+
+    @property
+    def statistics(self):
+        statistics = self._statistics.to_dict()
+        statistics['clingo'] = {'generator': self._candidates_gen.statistics,
+                                'test': self._candidates_test.statistics}
+        return statistics
@@ -1,23 +1,338 @@
+import clingo
+
+
+_TRUTH_VALUES = [clingo.TruthValue.Free, clingo.TruthValue.True_, clingo.TruthValue.False_,
+                 clingo.TruthValue.Release]
+_HEURISTIC_TYPES = [clingo.HeuristicType.Level, clingo.HeuristicType.Sign,
+                    clingo.HeuristicType.Factor, clingo.HeuristicType.Init,
+                    clingo.HeuristicType.True_, clingo.HeuristicType.False_]
+
+
 class WFMObserver:
 
     def __init__(self):
-        self._facts = set()
-        self._rules = []
+        self.recording = True
+        self.clear()
+
+    def clear(self):
+        self._heads = []
+        self._pending = []
+        self._positive = {}
+        self._negative = {}
+        self._support = {}
+        self._atoms = set()
+        self._open = set()
+        self._true = set()
+        self._false = set()
+        self._changes = []
+
+    def initialize(self, open_atoms, false_atoms):
+        self._open = set(open_atoms)
+        for atom in false_atoms:
+            self._assign(atom, False)
+        for index, pending in enumerate(self._pending):
+            if pending == 0:
+                self._assign(self._heads[index][0], True)
+        for atom in self._atoms:
+            if not self._support.get(atom) and atom not in self._open:
+                self._assign(atom, False)
+        self._atoms = set()
 
-    def get_facts(self):
-        return self._facts
+    def set_true(self, atom):
+        self._assign(atom, True)
 
-    def reset_facts(self):
-        self._facts = set()
+    def set_false(self, atom):
+        self._assign(atom, False)
 
-    def get_heads(self, externals):
-        return {atom for head, body in self._rules for atom in head
-                if not externals.intersection(body)}
+    def propagate(self):
+        true, false = [], []
+        while self._changes:
+            atom, value = self._changes.pop()
+            if value:
+                true.append(atom)
+                satisfied, blocked = self._positive, self._negative
+            else:
+                false.append(atom)
+                satisfied, blocked = self._negative, self._positive
+            for index in satisfied.pop(atom, ()):
+                self._satisfy(index)
+            for index in blocked.pop(atom, ()):
+                self._block(index)
+        return true, false
 
-    def reset_heads(self):
-        self._rules = []
+    def _assign(self, atom, value):
+        if atom not in self._true and atom not in self._false:
+            (self._true if value else self._false).add(atom)
+            self._changes.append((atom, value))
+
+    def _satisfy(self, index):
+        if self._heads[index] is not None:
+            self._pending[index] -= 1
+            if self._pending[index] == 0:
+                self._assign(self._heads[index][0], True)
+
+    def _block(self, index):
+        heads = self._heads[index]
+        if heads is not None:
+            self._heads[index] = None
+            for atom in heads:
+                self._support[atom] -= 1
+                if not self._support[atom] and atom not in self._open:
+                    self._assign(atom, False)
 
     def rule(self, choice, head, body):
-        if (len(head) == 1) and not body and not choice:
-            self._facts.add(head[0])
-        self._rules.append((head, body))
+        if not (self.recording and head):
+            return
+        index = len(self._heads)
+        self._heads.append(tuple(head))
+        self._pending.append(len(body) if (len(head) == 1) and not choice else -1)
+        for atom in head:
+            self._support[atom] = self._support.get(atom, 0) + 1
+        for literal in body:
+            if literal > 0:
+                self._positive.setdefault(literal, []).append(index)
+            else:
+                self._negative.setdefault(-literal, []).append(index)
+        self._atoms.update(head)
+        self._atoms.update(abs(literal) for literal in body)
+
+    def weight_rule(self, _choice, head, _lower_bound, body):
+        if not self.recording:
+            return
+        for atom in head:
+            self._support[atom] = self._support.get(atom, 0) + 1
+        self._atoms.update(head)
+        self._atoms.update(abs(literal) for literal, _ in body)
+
+
+class ProgramObserver:
+
+    def __init__(self, statements=None):
+        self.recording = statements is None
+        self._statements = statements if statements is not None else []
+
+    def reset(self):
+        self._statements = []
+
+    def size(self):
+        return len(self._statements)
+
+    def detach(self):
+        program = ProgramObserver(self._statements)
+        self._statements = []
+        return program
+
+    def replay(self, backend, symbols):
+        atoms = {}
+
+        def get_atom(atom):
+            if atom not in atoms:
+                atoms[atom] = backend.add_atom(symbols.get(atom))
+            return atoms[atom]
+
+        for statement, *arguments in self._translate(get_atom):
+            if statement == 'rule':
+                choice, head, body = arguments
+                backend.add_rule(head, body, choice)
+            elif statement == 'weight_rule':
+                choice, head, lower_bound, body = arguments
+                backend.add_weight_rule(head, lower_bound, body, choice)
+            elif statement == 'minimize':
+                backend.add_minimize(*arguments)
+            elif statement == 'external':
+                backend.add_external(*arguments)
+            elif statement == 'project':
+                backend.add_project(*arguments)
+            elif statement == 'heuristic':
+                backend.add_heuristic(*arguments)
+        return atoms
+
+    def renumber(self, atoms):
+        return ProgramObserver(list(self._translate(atoms.__getitem__)))
+
+    def _translate(self, get_atom):
+        def get_literal(literal):
+            return get_atom(literal) if literal > 0 else -get_atom(-literal)
+
+        for statement, *arguments in self._statements:
+            if statement == 'rule':
+                choice, head, body = arguments
+                yield (statement, choice, [get_atom(atom) for atom in head],
+                       [get_literal(literal) for literal in body])
+            elif statement == 'weight_rule':
+                choice, head, lower_bound, body = arguments
+                yield (statement, choice, [get_atom(atom) for atom in head], lower_bound,
+                       [(get_literal(literal), weight) for literal, weight in body])
+            elif statement == 'minimize':
+                priority, literals = arguments
+                yield (statement, priority,
+                       [(get_literal(literal), weight) for literal, weight in literals])
+            elif statement == 'external':
+                atom, value = arguments
+                yield statement, get_atom(atom), value
+            elif statement == 'project':
+                yield statement, [get_atom(atom) for atom in arguments[0]]
+            elif statement == 'heuristic':
+                atom, heuristic_type, bias, priority, condition = arguments
+                yield (statement, get_atom(atom), heuristic_type, bias, priority,
+                       [get_literal(literal) for literal in condition])
+
+    def write_aspif(self, output, symbols):
+        output.write('asp 1 0 0\n')
+        for statement, *arguments in self._statements:
+            if statement == 'rule':
+                choice, head, body = arguments
+                output.write(f'1 {int(choice)} {_join(head)} 0 {_join(body)}\n')
+            elif statement == 'weight_rule':
+                choice, head, lower_bound, body = arguments
+                output.write(f'1 {int(choice)} {_join(head)} 1 {lower_bound} '
+                             f'{_join_weighted(body)}\n')
+            elif statement == 'minimize':
+                priority, literals = arguments
+                output.write(f'2 {priority} {_join_weighted(literals)}\n')
+            elif statement == 'project':
+                output.write(f'3 {_join(arguments[0])}\n')
+            elif statement == 'external':
+                atom, value = arguments
+                output.write(f'5 {atom} {_TRUTH_VALUES.index(value)}\n')
+            elif statement == 'heuristic':
+                atom, heuristic_type, bias, priority, condition = arguments
+                output.write(f'7 {_HEURISTIC_TYPES.index(heuristic_type)} {atom} {bias} '
+                             f'{priority} {_join(condition)}\n')
+        for atom, symbol in sorted(symbols.items()):
+            name = str(symbol)
+            output.write(f'4 {len(name)} {name} 1 {atom}\n')
+        output.write('0\n')
+
+    @staticmethod
+    def read_aspif(input_stream):
+        statements = []
+        symbols = {}
+        header = input_stream.readline()
+        if not header.startswith('asp '):
+            raise ValueError('invalid aspif header')
+
+        for line in input_stream:
+            if line.startswith('4 '):
+                length, rest = line[2:].split(' ', 1)
+                name, rest = rest[:int(length)], rest[int(length):].split()
+                symbols[int(rest[1])] = clingo.parse_term(name)
+                continue
+
+            values = [int(value) for value in line.split()]
+            if values[0] == 0:
+                return ProgramObserver(statements), symbols
+            if values[0] == 1:
+                choice = bool(values[1])
+                head, position = _read(values, 2)
+                if values[position] == 0:
+                    body, _ = _read(values, position + 1)
+                    statements.append(('rule', choice, head, body))
+                else:
+                    body, _ = _read_weighted(values, position + 2)
+                    statements.append(('weight_rule', choice, head, values[position + 1], body))
+            elif values[0] == 2:
+                literals, _ = _read_weighted(values, 2)
+                statements.append(('minimize', values[1], literals))
+            elif values[0] == 3:
+                statements.append(('project', _read(values, 1)[0]))
+            elif values[0] == 5:
+                statements.append(('external', values[1], _TRUTH_VALUES[values[2]]))
+            elif values[0] == 7:
+                statements.append(('heuristic', values[2], _HEURISTIC_TYPES[values[1]],
+                                   values[3], values[4], _read(values, 5)[0]))
+        raise ValueError('incomplete aspif program')
+
+    def get_components(self, blocked, ignored=frozenset()):
+        parent = {}
+
+        def find(atom):
+            parent.setdefault(atom, atom)
+            while parent[atom] != atom:
+                parent[atom] = parent[parent[atom]]
+                atom = parent[atom]
+            return atom
+
+        for statement, *arguments in self._statements:
+            if statement == 'rule':
+                _, head, body = arguments
+                atoms = set(head) | {abs(literal) for literal in body}
+            elif statement == 'weight_rule':
+                _, head, _, body = arguments
+                atoms = set(head) | {abs(literal) for literal, _ in body}
+            else:
+                continue
+            atoms.difference_update(ignored)
+            if not atoms or blocked.intersection(atoms):
+                continue
+            roots = {find(atom) for atom in atoms}
+            root = roots.pop()
+            for other in roots:
+                parent[other] = root
+
+        return {atom: find(atom) for atom in parent}
+
+    def split(self, components):
+        programs = {}
+        for statement in self._statements:
+            name, *arguments = statement
+            if name == 'rule':
+                atoms = arguments[1] or [abs(literal) for literal in arguments[2]]
+            elif name == 'weight_rule':
+                atoms = arguments[1] or [abs(literal) for literal, _ in arguments[3]]
+            elif name == 'minimize':
+                atoms = [abs(literal) for literal, _ in arguments[1]]
+            elif name == 'external':
+                atoms = [arguments[0]]
+            elif name == 'heuristic':
+                atoms = [arguments[0]]
+            else:
+                atoms = arguments[0]
+            roots = {components.get(atom) for atom in atoms}
+            roots.discard(None)
+            for root in roots:
+                programs.setdefault(root, []).append(statement)
+        return {root: ProgramObserver(statements) for root, statements in programs.items()}
+
+    def rule(self, choice, head, body):
+        if self.recording:
+            self._statements.append(('rule', choice, head, body))
+
+    def weight_rule(self, choice, head, lower_bound, body):
+        if self.recording:
+            self._statements.append(('weight_rule', choice, head, lower_bound, body))
+
+    def minimize(self, priority, literals):
+        if self.recording:
+            self._statements.append(('minimize', priority, literals))
+
+    def external(self, atom, value):
+        if self.recording:
+            self._statements.append(('external', atom, value))
+
+    def project(self, atoms):
+        if self.recording:
+            self._statements.append(('project', atoms))
+
+    def heuristic(self, atom, heuristic_type, bias, priority, condition):
+        if self.recording:
+            self._statements.append(('heuristic', atom, heuristic_type, bias, priority,
+                                     condition))
+
+
+def _join(values):
+    return ' '.join(map(str, [len(values), *values]))
+
+
+def _join_weighted(values):
+    return ' '.join(map(str, [len(values), *(value for pair in values for value in pair)]))
+
+
+def _read(values, position):
+    end = position + 1 + values[position]
+    return values[position + 1:end], end
+
+
+def _read_weighted(values, position):
+    end = position + 1 + 2 * values[position]
+    return list(zip(values[position + 1:end:2], values[position + 2:end:2])), end
@@ -1,100 +1,255 @@
+from collections import namedtuple
 import clingo
-from eclingo.parser.observer import WFMObserver
+from eclingo.parser.observer import WFMObserver, ProgramObserver
+from eclingo.utils.logger import silent_logger
+from eclingo.utils.statistics import Statistics
+
+
+EpistemicAtom = namedtuple('EpistemicAtom', ['symbol', 'literal', 'objective',
+                                             'objective_literal', 'negated'])
 
 
 class Parser:
 
-    def __init__(self, candidates_gen, candidates_test, predicates, optimization):
+    def __init__(self, candidates_gen, candidates_test, predicates, optimization,
+                 show_signatures=(), statistics=None, heuristic=None, split_arguments=None,
+                 restore=None, record=False):
         self._candidates_gen = candidates_gen
         self._candidates_test = candidates_test
         self._predicates = predicates
         self._optimization = optimization
+        self._show_signatures = show_signatures
+        self._heuristic = heuristic
+        self._split_arguments = split_arguments
+        self._restore = restore
+        self._record = record
+        self._split_programs = {}
+        self._split_roots = {}
+        self._symbols = {}
+        self._fixed = set()
+        self._rejected = set()
+        self._signs = {}
+        self._statistics = statistics if statistics is not None else Statistics()
         self.epistemic_atoms = {}
+        self.epistemic_index = []
+        self.epistemic_dependencies = {}
+        self.show_atoms = []
         self.k_signatures = set()
+        self.components = []
+        self.rest_show_atoms = []
+        self.cost_atoms = []
+        self.ground_program = None
+        self.ground_symbols = {}
+        self.ground_state = {}
 
     def parse(self):
-        self._add_grounding_rules()
+        with self._statistics.phase('grounding'):
+            if self._restore is None:
+                self._add_grounding_rules()
+
+                program_observer = ProgramObserver()
+                self._candidates_gen.register_observer(program_observer, False)
+                if self._optimization > 2:
+                    wfm_observer = WFMObserver()
+                    self._candidates_gen.register_observer(wfm_observer, False)
+
+                self._candidates_gen.ground([('base', [])])
+                program_observer.recording = False
+                if self._optimization > 2:
+                    wfm_observer.recording = False
+            else:
+                program_observer = self._restore_ground_program()
+            components = self._share_ground_program(program_observer)
+
+        with self._statistics.phase('choice_rules'):
+            if self._restore is None:
+                self.k_signatures.update({(literal.atom.term.name,
+                                           len(literal.atom.term.arguments), True)
+                                          for literal, _ in self._predicates})
+            else:
+                self.k_signatures.update(tuple(signature)
+                                         for signature in self._restore[2]['k_signatures'])
+            self._add_epistemic_index()
 
         if self._optimization > 2:
-            self._approximate_wfm()
-        else:
-            self._candidates_gen.ground([('base', [])])
-        self._candidates_test.ground([('base', [])])
+            with self._statistics.phase('wfm'):
+                if self._restore is None:
+                    self._approximate_wfm(wfm_observer)
+                else:
+                    self._restore_fixed_atoms()
+        if self._record:
+            self.ground_state = {
+                'k_signatures': sorted(self.k_signatures),
+                'fixed': [str(epistemic.symbol) for epistemic in self.epistemic_index
+                          if epistemic.literal in self._fixed],
+                'rejected': [str(epistemic.symbol) for epistemic in self.epistemic_index
+                             if epistemic.literal in self._rejected]
+            }
+
+        with self._statistics.phase('choice_rules'):
+            self._add_choice_rules()
+            self._add_show_atoms()
+            if self._optimization > 3:
+                self._add_epistemic_dependencies(components)
+            self._remove_grounding_rules()
+            self._add_cost_atoms()
 
-        self.k_signatures.update({(literal.atom.term.name, len(literal.atom.term.arguments), True)
-                                  for literal, _ in self._predicates})
+            self._add_projection_directives()
 
-        self._add_choice_rules()
-        self._remove_grounding_rules()
+            if self._optimization > 0:
+                self._optimization1()
 
-        self._add_projection_directives()
+        if self._heuristic is not None:
+            with self._statistics.phase('heuristics'):
+                self._add_heuristics()
+            if self._record:
+                self.ground_state['signs'] = {str(symbol): sign
+                                              for symbol, sign in self._signs.items()}
 
-        if self._optimization > 0:
-            self._optimization1()
+        if self._split_arguments is not None:
+            with self._statistics.phase('splitting'):
+                self._split_program()
+            self._statistics.set('components', len(self.components))
+        self._statistics.set('epistemic_atoms', len(self.epistemic_index))
 
     def _add_grounding_rules(self):
-        rules = []
-        external = '_atom_to_be_released'
-
-        for (predicate, positive_body) in self._predicates:
-            epistemic_term = predicate.atom.term
-            term = epistemic_term.name.replace('aux_', '')
-            negative = ''
-            if 'not_' in term:
-                term = term.replace('not_', '')
-                negative = 'not '
-            if 'sn_' in term:
-                term = term.replace('sn_', '-')
-
-            body = []
-            for body_literal in positive_body:
-                body_literal = body_literal.atom.term
-                if body_literal.arguments:
-                    body_literal_arguments = (', ').join([str(argument)
-                                                          for argument in body_literal.arguments])
-                    body.append(f'{body_literal.name}({body_literal_arguments})')
-                else:
-                    body.append(body_literal.name)
-            body.append(external)
-            body_string = (', ').join(body)
-
-            if epistemic_term.arguments:
-                epistemic_arguments = (', ').join([str(argument)
-                                                   for argument in epistemic_term.arguments])
-                rules.append(f'{epistemic_term.name}({epistemic_arguments}) \
-                    :- {negative}{term}({epistemic_arguments}), {body_string}.')
-            else:
-                rules.append(f'{epistemic_term.name} :- {negative}{term}, {body_string}.')
+        location = {'begin': {'filename': '<eclingo>', 'line': 1, 'column': 1},
+                    'end': {'filename': '<eclingo>', 'line': 1, 'column': 1}}
+        external = clingo.ast.SymbolicAtom(
+            clingo.ast.Function(location, '_atom_to_be_released', [], False))
+
+        with self._candidates_gen.builder() as builder:
+            builder.add(clingo.ast.External(location, external, []))
 
-        for control_object in [self._candidates_gen, self._candidates_test]:
-            control_object.add('base', [], f'#external {external}.')
-            control_object.add('base', [], '\n'.join(rules))
+            for (predicate, positive_body) in self._predicates:
+                epistemic_term = predicate.atom.term
+                objective_name = epistemic_term.name[len('aux_'):]
+                sign = clingo.ast.Sign.NoSign
+                if objective_name.startswith('not_'):
+                    objective_name = objective_name[len('not_'):]
+                    sign = clingo.ast.Sign.Negation
+                strong_negation = objective_name.startswith('sn_')
+                if strong_negation:
+                    objective_name = objective_name[len('sn_'):]
+                objective_term = clingo.ast.Function(predicate.location, objective_name,
+                                                     epistemic_term.arguments, False)
+                if strong_negation:
+                    objective_term = clingo.ast.UnaryOperation(predicate.location,
+                                                               clingo.ast.UnaryOperator.Minus,
+                                                               objective_term)
+
+                body = [clingo.ast.Literal(predicate.location, sign,
+                                           clingo.ast.SymbolicAtom(objective_term))]
+                body.extend(clingo.ast.Literal(literal.location, clingo.ast.Sign.NoSign,
+                                               literal.atom)
+                            for literal in positive_body)
+                body.append(clingo.ast.Literal(predicate.location, clingo.ast.Sign.NoSign,
+                                               external))
+
+                builder.add(clingo.ast.Rule(predicate.location,
+                                            clingo.ast.Literal(predicate.location,
+                                                               clingo.ast.Sign.NoSign,
+                                                               clingo.ast.SymbolicAtom(
+                                                                   epistemic_term)),
+                                            body))
+
+    def _share_ground_program(self, observer):
+        symbols = {atom.literal: atom.symbol for atom in self._candidates_gen.symbolic_atoms}
+        with self._candidates_test.backend() as backend:
+            observer.replay(backend, symbols)
+        self._statistics.set('ground_atoms', len(symbols))
+        self._statistics.set('ground_statements', observer.size())
+
+        external = self._candidates_gen.symbolic_atoms[clingo.Function('_atom_to_be_released')]
+        blocked = {external.literal} if external is not None else set()
+        components = None
+        if self._optimization > 3:
+            components = observer.get_components(blocked)
+        if self._split_arguments is not None:
+            self._symbols = symbols
+            self._split_roots = observer.get_components(set(), blocked)
+            self._split_programs = observer.split(self._split_roots)
+        if self._record:
+            self.ground_program = observer.detach()
+            self.ground_symbols = symbols
+        else:
+            observer.reset()
+        return components
+
+    def _restore_ground_program(self):
+        program, symbols, _ = self._restore
+        with self._candidates_gen.backend() as backend:
+            atoms = program.replay(backend, symbols)
+        return program.renumber(atoms)
+
+    def _restore_fixed_atoms(self):
+        state = self._restore[2]
+        fixed = {clingo.parse_term(symbol) for symbol in state['fixed']}
+        rejected = {clingo.parse_term(symbol) for symbol in state['rejected']}
+        self._rejected = {epistemic.literal for epistemic in self.epistemic_index
+                          if epistemic.symbol in rejected}
+        self._fix_atoms({epistemic.literal for epistemic in self.epistemic_index
+                         if epistemic.symbol in fixed})
+
+    def _add_epistemic_index(self):
+        for (name, arity, positive) in sorted(self.k_signatures):
+            for atom in self._candidates_gen.symbolic_atoms.by_signature(name, arity, positive):
+                epistemic_symbol = atom.symbol
+                objective_symbol, negated = self._get_objective_symbol(epistemic_symbol)
+                objective_atom = self._candidates_test.symbolic_atoms[objective_symbol]
+                objective_literal = objective_atom.literal if objective_atom is not None else None
+
+                self.epistemic_atoms.update({epistemic_symbol: objective_symbol})
+                self.epistemic_index.append(EpistemicAtom(epistemic_symbol, atom.literal,
+                                                          objective_symbol, objective_literal,
+                                                          negated))
+
+        with self._candidates_test.backend() as test_backend:
+            for epistemic in self.epistemic_index:
+                test_backend.add_rule([test_backend.add_atom(epistemic.symbol)], [], True)
 
     def _add_choice_rules(self):
+        rejected = [epistemic for epistemic in self.epistemic_index
+                    if epistemic.literal in self._rejected]
+        self.epistemic_index = [epistemic for epistemic in self.epistemic_index
+                                if epistemic.literal not in self._rejected]
+        for epistemic in rejected:
+            del self.epistemic_atoms[epistemic.symbol]
+
         with self._candidates_gen.backend() as gen_backend, \
                 self._candidates_test.backend() as test_backend:
-            for (name, arity, positive) in self.k_signatures:
-                for atom in self._candidates_gen.symbolic_atoms \
-                        .by_signature(name, arity, positive):
-                    gen_backend.add_rule([atom.literal], [], True)
-                    test_backend.add_rule([atom.literal], [], True)
-
-                    epistemic_symbol = atom.symbol
-                    name = epistemic_symbol.name.replace('aux_', '')
-                    positive = True
-                    if 'sn_' in epistemic_symbol.name:
-                        name = name.replace('sn_', '')
-                        positive = False
-                    if 'not_' in epistemic_symbol.name:
-                        name = name.replace('not_', '')
-                    self.epistemic_atoms.update(
-                        {epistemic_symbol: clingo.Function(name, epistemic_symbol.arguments,
-                                                           positive)})
+            for epistemic in self.epistemic_index:
+                gen_backend.add_rule([epistemic.literal], [], True)
+            for epistemic in rejected:
+                gen_backend.add_rule([], [epistemic.literal], False)
+                test_backend.add_rule([], [test_backend.add_atom(epistemic.symbol)], False)
+
+    def _add_show_atoms(self):
+        for (name, arity, positive) in sorted(self._show_signatures):
+            self.show_atoms.extend((atom.symbol, atom.literal) for atom in
+                                   self._candidates_test.symbolic_atoms.by_signature(
+                                       name, arity, positive))
+
+    def _add_epistemic_dependencies(self, components):
+        members = {}
+        for epistemic in self.epistemic_index:
+            if epistemic.literal in components:
+                members.setdefault(components[epistemic.literal], []).append(epistemic.symbol)
+
+        for epistemic in self.epistemic_index:
+            objective = self._candidates_gen.symbolic_atoms[epistemic.objective]
+            root = components.get(objective.literal) if objective is not None else None
+            self.epistemic_dependencies[epistemic.symbol] = members.get(root, [])
 
     def _remove_grounding_rules(self):
         self._candidates_gen.cleanup()
         self._candidates_test.cleanup()
 
+    def _add_cost_atoms(self):
+        for atom in self._candidates_gen.symbolic_atoms.by_signature('_world_view_cost', 3):
+            weight, priority, _ = atom.symbol.arguments
+            self.cost_atoms.append((weight.number, priority.number, atom.literal))
+
     def _add_projection_directives(self):
         projection_directives = ''
         for (name, arity, _) in self.k_signatures:
@@ -111,45 +266,180 @@ class Parser:
                     atom_lit = 0-atom_lit
                 backend.add_rule([], [backend.add_atom(epistemic), atom_lit], False)
 
-    def _approximate_wfm(self):
-        observer = WFMObserver()
-        self._candidates_gen.register_observer(observer, False)
-        visited = []
-        test = True
-        while test:
-            self._candidates_gen.ground([('base', [])])
-
-            externals = {atom.literal for atom in self._candidates_gen.symbolic_atoms
-                         if atom.is_external}
-            symbolic_atoms = {atom.literal: str(atom.symbol)
-                              for atom in self._candidates_gen.symbolic_atoms}
-            affected_atoms = {symbol.replace('aux_', '').replace('not_', '').replace('sn_', '-')
-                              for symbol in symbolic_atoms.values()
-                              if 'aux_' in symbol}
-
-            facts = {symbolic_atoms.get(fact) for fact in observer.get_facts()}
-            heads = {symbolic_atoms.get(head) for head in observer.get_heads(externals)}
-
-            found = []
-            for fact in facts:
-                if fact not in visited:
-                    aux_atom = 'aux_'
-                    aux_atom += fact.replace('-', 'sn_')
-                    found.append(f'{aux_atom}.')
-                    visited.append(fact)
-                    visited.append(aux_atom)
-            for atom in affected_atoms:
-                if atom not in visited and atom not in heads:
-                    aux_atom = 'aux_not_'
-                    aux_atom += atom.replace('-', 'sn_')
-                    found.append(f'{aux_atom}.')
-                    visited.append(atom)
-                    visited.append(aux_atom)
-
-            if found:
-                self._candidates_gen.add('base', [], "%s" % ("\n").join(found))
-                observer.reset_facts()
-                observer.reset_heads()
+    def _add_heuristics(self):
+        if self._restore is not None and 'signs' in self._restore[2]:
+            saved = self._restore[2]['signs']
+            signs = [saved.get(str(epistemic.symbol), -1) for epistemic in self.epistemic_index]
+        elif self._heuristic == 'brave':
+            derivable = self._get_brave_consequences()
+            signs = [1 if (epistemic.objective_literal in derivable) != epistemic.negated else -1
+                     for epistemic in self.epistemic_index]
+        else:
+            signs = [-1] * len(self.epistemic_index)
+        self._signs = {epistemic.symbol: sign
+                       for epistemic, sign in zip(self.epistemic_index, signs)}
+
+        with self._candidates_gen.backend() as backend:
+            for epistemic, sign in zip(self.epistemic_index, signs):
+                self._add_heuristic(backend, epistemic.literal, sign)
+
+    @staticmethod
+    def _add_heuristic(backend, literal, sign):
+        backend.add_heuristic(literal, clingo.HeuristicType.Level, 1, 0, [])
+        backend.add_heuristic(literal, clingo.HeuristicType.Sign, sign, 0, [])
+
+    def _get_brave_consequences(self):
+        return self._get_consequences('brave', []) or set()
+
+    def _get_consequences(self, enum_mode, assumptions):
+        literals = {epistemic.objective_literal for epistemic in self.epistemic_index
+                    if epistemic.objective_literal is not None}
+        self._candidates_test.configuration.solve.enum_mode = enum_mode
+        consequences_model = None
+        with self._candidates_test.solve(yield_=True, assumptions=assumptions) \
+                as candidates_test_handle:
+            for consequences_model in candidates_test_handle:
+                pass
+            if consequences_model is None:
+                return None
+            return {literal for literal in literals if consequences_model.is_true(literal)}
+
+    def _get_unsupported(self, fixed):
+        assumptions = [(epistemic.symbol, epistemic.literal in fixed)
+                       for epistemic in self.epistemic_index
+                       if epistemic.literal in fixed or epistemic.literal in self._rejected]
+        brave = self._get_consequences('brave', assumptions)
+        if brave is None:
+            return []
+        cautious = self._get_consequences('cautious', assumptions)
+
+        unsupported = []
+        for epistemic in self.epistemic_index:
+            if epistemic.literal in fixed or epistemic.literal in self._rejected:
+                continue
+            if epistemic.negated:
+                if epistemic.objective_literal in cautious:
+                    unsupported.append(epistemic.literal)
+            elif epistemic.objective_literal not in brave:
+                unsupported.append(epistemic.literal)
+        return unsupported
+
+    def _set_test_externals(self, value):
+        with self._candidates_test.backend() as backend:
+            for atom in self._candidates_test.symbolic_atoms:
+                if atom.is_external and atom.symbol != clingo.Function('_atom_to_be_released'):
+                    backend.add_external(atom.literal, value)
+
+    def _approximate_wfm(self, observer):
+        symbolic_atoms = self._candidates_gen.symbolic_atoms
+        external = symbolic_atoms[clingo.Function('_atom_to_be_released')]
+        released = {external.literal} if external is not None else set()
+
+        epistemic_literals = {}
+        open_atoms = set()
+        found = []
+        for atom in symbolic_atoms:
+            if atom.is_external and atom.literal not in released:
+                open_atoms.add(atom.literal)
+            if not atom.symbol.name.startswith('aux_'):
+                continue
+            open_atoms.add(atom.literal)
+            objective_symbol, negated = self._get_objective_symbol(atom.symbol)
+            objective_atom = symbolic_atoms[objective_symbol]
+            if objective_atom is not None:
+                epistemic_literals.setdefault(objective_atom.literal, []) \
+                    .append((atom.literal, negated))
+            elif negated:
+                found.append(atom.literal)
+
+        observer.initialize(open_atoms, released)
+        if self._optimization > 4:
+            self._set_test_externals(clingo.TruthValue.Free)
+        fixed = set()
+        while True:
+            self._statistics.increment('wfm_iterations')
+            fixed.update(found)
+            for literal in found:
+                observer.set_true(literal)
+            true, false = observer.propagate()
+
+            found = [literal for atom in true
+                     for literal, negated in epistemic_literals.get(atom, ()) if not negated]
+            found.extend(literal for atom in false
+                         for literal, negated in epistemic_literals.get(atom, ()) if negated)
+            found = [literal for literal in found if literal not in fixed]
+            if not found and self._optimization > 4:
+                unsupported = self._get_unsupported(fixed)
+                self._rejected.update(unsupported)
+                for literal in unsupported:
+                    observer.set_false(literal)
+                if unsupported:
+                    continue
+            if not found:
+                break
+        # the observer stays registered with the control, so it should not keep the rules alive
+        observer.clear()
+
+        if self._optimization > 4:
+            self._set_test_externals(clingo.TruthValue.False_)
+            self._statistics.set('consequence_rejected_atoms', len(self._rejected))
+        self._statistics.set('wfm_fixed_atoms', len(fixed))
+        self._fix_atoms(fixed)
+
+    def _fix_atoms(self, fixed):
+        self._fixed = fixed
+        with self._candidates_gen.backend() as backend:
+            for literal in sorted(fixed):
+                backend.add_rule([literal], [], False)
+
+    def _split_program(self):
+        groups = {}
+        for epistemic in self.epistemic_index:
+            root = self._split_roots.get(epistemic.literal, epistemic.literal)
+            groups.setdefault(root, []).append(epistemic)
+
+        positions = {root: position for position, root in enumerate(groups)}
+        show_atoms = [[] for _ in groups]
+        for symbol, literal in self.show_atoms:
+            atom = self._candidates_gen.symbolic_atoms[symbol]
+            root = self._split_roots.get(atom.literal) if atom is not None else None
+            if root in positions:
+                show_atoms[positions[root]].append((symbol, literal))
             else:
-                test = False
-                del observer
+                self.rest_show_atoms.append((symbol, literal))
+
+        for (root, epistemic_index), component_show_atoms in zip(groups.items(), show_atoms):
+            control = self._get_component_control(self._split_programs.get(root),
+                                                  epistemic_index)
+            self.components.append((control, epistemic_index, component_show_atoms))
+
+    def _get_component_control(self, program, epistemic_index):
+        control = clingo.Control(self._split_arguments, logger=silent_logger)
+        with control.backend() as backend:
+            if program is not None:
+                program.replay(backend, self._symbols)
+
+            literals = [backend.add_atom(epistemic.symbol) for epistemic in epistemic_index]
+            for epistemic, literal in zip(epistemic_index, literals):
+                backend.add_rule([literal], [], True)
+                if epistemic.literal in self._fixed:
+                    backend.add_rule([literal], [], False)
+                if self._optimization > 0:
+                    objective_literal = backend.add_atom(epistemic.objective)
+                    backend.add_rule([], [literal, objective_literal if epistemic.negated
+                                          else -objective_literal], False)
+                if epistemic.symbol in self._signs:
+                    self._add_heuristic(backend, literal, self._signs[epistemic.symbol])
+            backend.add_project(literals)
+        return control
+
+    @staticmethod
+    def _get_objective_symbol(epistemic_symbol):
+        name = epistemic_symbol.name[len('aux_'):]
+        negated = name.startswith('not_')
+        if negated:
+            name = name[len('not_'):]
+        positive = not name.startswith('sn_')
+        if not positive:
+            name = name[len('sn_'):]
+        return clingo.Function(name, epistemic_symbol.arguments, positive), negated
@@ -1,59 +1,115 @@
+from array import array
+from enum import IntEnum
+import sys
+
+
 class Postprocessor:
 
-    def __init__(self, candidates_test, show_signatures):
-        self._candidates_test = candidates_test
+    def __init__(self, show_signatures):
         self._show_signatures = show_signatures
-
-    def postprocess(self, model, assumptions):
-        symbols = []
+        self._signatures = {}
+        self._ids = {}
+        self._atoms = []
+        self._keys = []
+
+    def postprocess(self, model, assumptions, consequences):
+        if self._show_signatures:
+            return Model(self._intern(consequences), self)
         if assumptions:
-            if self._show_signatures:
-                show_atoms = []
-                for (name, arity, positive) in self._show_signatures:
-                    show_atoms += [atom.symbol for atom in
-                                   self._candidates_test.symbolic_atoms.by_signature(
-                                    name, arity, positive)]
-
-                self._candidates_test.configuration.solve.enum_mode = 'cautious'
-                with self._candidates_test.solve(yield_=True, assumptions=assumptions) \
-                        as candidates_test_handle:
-                    *_, cautious_model = candidates_test_handle
-                    k_atoms = [atom for atom in show_atoms
-                               if atom in cautious_model.symbols(atoms=True)]
-
-                symbols = [Symbol(atom.name, atom.arguments, True, EpistemicSign.NoSign
-                           if atom.positive else EpistemicSign.StrongNegation)
-                           for atom in k_atoms]
-            else:
-                symbols = [Symbol(atom.name.replace('aux_', '').replace('sn_', '')
-                           .replace('not_', ''), atom.arguments, True,
-                           EpistemicSign.BothNegations if 'not_sn_' in atom.name else
-                           EpistemicSign.StrongNegation if 'sn_' in atom.name else
-                           EpistemicSign.Negation if 'not_' in atom.name else
-                           EpistemicSign.NoSign) for atom in model]
-        return Model(symbols)
+            return Model(self._intern(model), self)
+        return Model(())
+
+    def decode(self, atom_id):
+        atom = self._atoms[atom_id]
+        if self._show_signatures:
+            return Symbol(atom.name, atom.arguments, True,
+                          EpistemicSign.NoSign if atom.positive else EpistemicSign.StrongNegation)
+        signature = self._signatures.get(atom.name)
+        if signature is None:
+            signature = self._signatures[atom.name] = self._get_signature(atom.name)
+        return Symbol(signature[0], atom.arguments, True, signature[1])
+
+    def get_key(self, atom_id):
+        key = self._keys[atom_id]
+        if key is None:
+            key = self._keys[atom_id] = _get_symbol_key(self.decode(atom_id))
+        return key
+
+    def _intern(self, atoms):
+        ids = self._ids
+        atom_ids = []
+        for atom in atoms:
+            atom_id = ids.get(atom)
+            if atom_id is None:
+                atom_id = ids[atom] = len(self._atoms)
+                self._atoms.append(atom)
+                self._keys.append(None)
+            atom_ids.append(atom_id)
+        return array('i', sorted(atom_ids))
+
+    @staticmethod
+    def _get_signature(name):
+        name = name[len('aux_'):]
+        negation = name.startswith('not_')
+        if negation:
+            name = name[len('not_'):]
+        strong_negation = name.startswith('sn_')
+        if strong_negation:
+            name = name[len('sn_'):]
+        return name, EpistemicSign(2 * (not negation) + (not strong_negation))
 
 
 class Model:
 
-    def __init__(self, symbols):
-        self.symbols = symbols
+    __slots__ = ('_atoms', '_postprocessor', '_symbols', '_key')
+
+    def __init__(self, symbols, postprocessor=None):
+        self._atoms = symbols if postprocessor is not None else tuple(symbols)
+        self._postprocessor = postprocessor
+        self._symbols = None if postprocessor is not None else sorted(self._atoms)
+        self._key = None
+
+    @property
+    def symbols(self):
+        if self._symbols is None:
+            self._symbols = sorted(map(self._postprocessor.decode, self._atoms))
+        return self._symbols
+
+    def _get_key(self):
+        # decoded literals without sorting, the same for fresh and cached world views
+        if self._key is None:
+            if self._postprocessor is None:
+                self._key = frozenset(map(_get_symbol_key, self._atoms))
+            else:
+                self._key = frozenset(map(self._postprocessor.get_key, self._atoms))
+        return self._key
 
     def __repr__(self):
-        return ' '.join(map(str, sorted(self.symbols)))
+        return ' '.join(map(str, self.symbols))
 
     def __eq__(self, other):
-        return self.symbols == other.symbols
+        if not isinstance(other, Model):
+            return NotImplemented
+        if self._postprocessor is not None and self._postprocessor is other._postprocessor:
+            return self._atoms == other._atoms
+        return self._get_key() == other._get_key()
 
     def __lt__(self, other):
+        if not isinstance(other, Model):
+            return NotImplemented
         return self.symbols < other.symbols
 
+    def __hash__(self):
+        return hash(self._get_key())
+
 
 class Symbol:
 
+    __slots__ = ('name', 'arguments', 'sign', 'epistemic_sign')
+
     def __init__(self, name, arguments, sign, epistemic_sign):
-        self.name = name
-        self.arguments = arguments
+        self.name = sys.intern(name)
+        self.arguments = tuple(arguments)
         self.sign = '' if sign else 'not '
         self.epistemic_sign = epistemic_sign
 
@@ -71,46 +127,26 @@ class Symbol:
         return (self.epistemic_sign, self.name, self.arguments) \
             < (other.epistemic_sign, other.name, other.arguments)
 
+    def __hash__(self):
+        return hash((self.name, self.arguments, self.sign, self.epistemic_sign))
 
-class _EpistemicNoSign:
-
-    def __repr__(self):
-        return ''
-
-    def __lt__(self, other):
-        return False
-
-
-class _EpistemicStrongNegation:
-
-    def __repr__(self):
-        return '-'
-
-    def __lt__(self, other):
-        return other == EpistemicSign.NoSign
-
-
-class _EpistemicNegation:
-
-    def __repr__(self):
-        return '~ '
 
-    def __lt__(self, other):
-        return other in [EpistemicSign.NoSign, EpistemicSign.StrongNegation]
+class EpistemicSign(IntEnum):
 
+    BothNegations = 0
+    Negation = 1
+    StrongNegation = 2
+    NoSign = 3
 
-class _EpistemicBothNegations:
+    def __str__(self):
+        return _EPISTEMIC_SIGN_STRINGS[self]
 
-    def __repr__(self):
-        return '~ -'
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
 
-    def __lt__(self, other):
-        return True
 
+_EPISTEMIC_SIGN_STRINGS = ('~ -', '~ ', '-', '')
 
-class EpistemicSign:
 
-    NoSign = _EpistemicNoSign()
-    Negation = _EpistemicNegation()
-    StrongNegation = _EpistemicStrongNegation()
-    BothNegations = _EpistemicBothNegations()
+def _get_symbol_key(symbol):
+    return symbol.sign, int(symbol.epistemic_sign), symbol.name, tuple(symbol.arguments)
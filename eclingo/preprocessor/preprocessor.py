@@ -2,32 +2,57 @@ from abc import ABC
 import clingo
 
 
+_CHUNK_SIZE = 1 << 22
+
+
 class Preprocessor(ABC):
 
-    def __init__(self, candidates_gen, candidates_test, optimization):
+    def __init__(self, candidates_gen, optimization, digest=None):
         self._candidates_gen = candidates_gen
-        self._candidates_test = candidates_test
         self._optimization = optimization
+        self._digest = digest
+        self._builder = None
         self.predicates = []
         self.show_signatures = set()
 
     def preprocess(self, program):
-        clingo.parse_program(program, lambda ast: self._preprocess(ast))
+        with self._candidates_gen.builder() as builder:
+            self._builder = builder
+            clingo.parse_program(program, lambda ast: self._preprocess(ast))
+        self._builder = None
+
+    def preprocess_file(self, input_path, chunk_size=_CHUNK_SIZE):
+        with self._candidates_gen.builder() as builder, \
+                open(input_path, 'r', encoding='utf-8') as input_file:
+            self._builder = builder
+            for offset, chunk in _read_chunks(input_file, chunk_size):
+                self._preprocess_chunk(chunk, offset)
+        self._builder = None
+
+    def _preprocess_chunk(self, chunk, offset):
+        if offset:
+            clingo.parse_program(chunk, lambda ast: self._preprocess(_shift_lines(ast, offset)))
+        else:
+            clingo.parse_program(chunk, lambda ast: self._preprocess(ast))
 
     def _preprocess(self, ast):
+        if self._digest is not None:
+            self._digest.update(f'{ast}\n'.encode())
+
         if ast.type == clingo.ast.ASTType.Rule:
-            rule = self._preprocess_rule(ast)
-            for control_object in [self._candidates_gen, self._candidates_test]:
-                with control_object.builder() as builder:
-                    builder.add(rule)
+            self._builder.add(self._preprocess_rule(ast))
+
+        elif ast.type == clingo.ast.ASTType.Minimize:
+            if any(literal.type == clingo.ast.ASTType.Literal
+                   and literal.atom.type == clingo.ast.ASTType.TheoryAtom
+                   for literal in ast.body):
+                self._builder.add(self._preprocess_rule(self._get_cost_rule(ast)))
 
         elif ast.type == clingo.ast.ASTType.ShowSignature:
             self.show_signatures.add((ast.name, ast.arity, ast.positive))
 
-        elif ast.type == clingo.ast.ASTType.Definition:
-            for control_object in [self._candidates_gen, self._candidates_test]:
-                with control_object.builder() as builder:
-                    builder.add(ast)
+        elif ast.type in (clingo.ast.ASTType.Definition, clingo.ast.ASTType.External):
+            self._builder.add(ast)
 
     def _preprocess_rule(self, ast):
         preprocessed_body = []
@@ -38,7 +63,7 @@ class Preprocessor(ABC):
                 body_literal = self._get_preprocessed_literal(body_literal)
                 preprocessed_body.append(body_literal)
 
-                body_positive = []
+                body_positive = ()
                 if 'not_' in body_literal.atom.term.name:
                     body_positive = self._get_body_positive(ast)
                 self.predicates.append((body_literal, body_positive))
@@ -47,6 +72,16 @@ class Preprocessor(ABC):
 
         return clingo.ast.Rule(ast.location, ast.head, preprocessed_body)
 
+    def _get_cost_rule(self, ast):
+        cost = clingo.ast.Function(ast.location, '_world_view_cost',
+                                   [ast.weight, ast.priority,
+                                    clingo.ast.Function(ast.location, '', ast.tuple, False)],
+                                   False)
+        return clingo.ast.Rule(ast.location,
+                               clingo.ast.Literal(ast.location, clingo.ast.Sign.NoSign,
+                                                  clingo.ast.SymbolicAtom(cost)),
+                               ast.body)
+
     def _get_preprocessed_literal(self, literal):
         theory_term = literal.atom.elements[0].tuple[0]
         theory_element = theory_term.elements[0]
@@ -79,9 +114,9 @@ class Preprocessor(ABC):
             else literal.sign
 
     def _get_body_positive(self, ast):
-        return [literal for literal in ast.body
-                if (literal.atom.type != clingo.ast.ASTType.TheoryAtom)
-                and (literal.sign != clingo.ast.Sign.Negation)]
+        return tuple(literal for literal in ast.body
+                     if (literal.atom.type != clingo.ast.ASTType.TheoryAtom)
+                     and (literal.sign != clingo.ast.Sign.Negation))
 
     def _get_theory_function_argument(self, argument):
         argument = argument.elements[0].term
@@ -107,7 +142,7 @@ class K15Preprocessor(Preprocessor):
 
                 body_literal = self._get_preprocessed_literal(body_literal)
 
-                body_positive = []
+                body_positive = ()
                 if ('not_' in body_literal.atom.term.name) or \
                         (body_literal.sign == clingo.ast.Sign.Negation):
                     body_positive = self._get_body_positive(ast)
@@ -120,12 +155,10 @@ class K15Preprocessor(Preprocessor):
                     aux_literal = self._get_not_aux_literal(body_literal)
                     preprocessed_body.append(aux_literal)
 
-                    for control_object in [self._candidates_gen, self._candidates_test]:
-                        with control_object.builder() as builder:
-                            builder.add(clingo.ast.Rule(ast.location, aux_literal,
-                                        [body_literal] + body_positive))
-                            builder.add(clingo.ast.Rule(ast.location, aux_literal, [
-                                self._get_objective_literal(body_literal)] + body_positive))
+                    self._builder.add(clingo.ast.Rule(ast.location, aux_literal,
+                                                      [body_literal, *body_positive]))
+                    self._builder.add(clingo.ast.Rule(ast.location, aux_literal, [
+                        self._get_objective_literal(body_literal), *body_positive]))
             else:
                 preprocessed_body.append(body_literal)
 
@@ -168,3 +201,64 @@ class K15Preprocessor(Preprocessor):
                                                           term.arguments,
                                                           False)
                                   ))
+
+
+def _read_chunks(input_file, chunk_size=_CHUNK_SIZE):
+    # chunks end after a statement outside comments and strings, and come with the number of
+    # lines before them so that parser locations can be shifted to the lines of the file
+    lines = []
+    size = 0
+    offset = 0
+    in_comment = False
+    splittable = True
+    for number, line in enumerate(input_file):
+        lines.append(line)
+        size += len(line)
+
+        if '%' in line:
+            if '"' in line:
+                splittable = False
+            in_comment = _ends_in_comment(line, in_comment)
+            continue
+        if in_comment or '"' in line or size < chunk_size or not splittable:
+            continue
+        stripped = line.rstrip()
+        if stripped.endswith('.') and not stripped.endswith('..'):
+            yield offset, ''.join(lines)
+            offset = number + 1
+            lines = []
+            size = 0
+
+    if lines:
+        yield offset, ''.join(lines)
+
+
+def _shift_lines(ast, offset):
+    for key, value in list(ast.items()):
+        if key == 'location':
+            ast.location = {position: dict(value[position], line=value[position]['line'] + offset)
+                            for position in ('begin', 'end')}
+        elif isinstance(value, clingo.ast.AST):
+            _shift_lines(value, offset)
+        elif isinstance(value, list):
+            for element in value:
+                if isinstance(element, clingo.ast.AST):
+                    _shift_lines(element, offset)
+    return ast
+
+
+def _ends_in_comment(line, in_comment):
+    position = 0
+    while True:
+        if in_comment:
+            position = line.find('*%', position)
+            if position < 0:
+                return True
+            position += 2
+            in_comment = False
+        else:
+            position = line.find('%', position)
+            if position < 0 or not line.startswith('%*', position):
+                return False
+            position += 2
+            in_comment = True
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import socketserver
+import stat
+import sys
+from time import perf_counter as timer
+import clingo
+import eclingo.main as eclingo
+
+
+class Server:
+
+    def __init__(self, input_files, semantics=False, optimization=eclingo.__optimization__,
+                 constants=()):
+        self._input_files = input_files
+        self._semantics = semantics
+        self._optimization = optimization
+        self._constants = list(constants)
+        self._control = self._get_control(semantics)
+        self._control.parse()
+
+    def serve(self, input_stream, output_stream):
+        for line in input_stream:
+            if line.strip():
+                self.handle(line, output_stream)
+
+    def handle(self, line, output_stream):
+        request_id = None
+        start = timer()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('queries must be JSON objects')
+            request_id = request.get('id')
+            models = 0
+            for models, model in enumerate(self.query(request), 1):
+                self._write(output_stream, {'id': request_id, 'answer': models,
+                                            'model': [str(symbol) for symbol in
+                                                      sorted(model.symbols)]})
+            self._write(output_stream, {'id': request_id,
+                                        'result': 'SATISFIABLE' if models else 'UNSATISFIABLE',
+                                        'models': models,
+                                        'time': timer() - start})
+        except (ValueError, RuntimeError, KeyError, TypeError, AttributeError) as error:
+            self._write(output_stream, {'id': request_id, 'error': str(error)})
+
+    def query(self, request):
+        semantics = request.get('k15', self._semantics)
+        externals = [clingo.parse_term(atom) for atom in request.get('externals', ())]
+        facts = self._get_external_facts(request.get('program'))
+        if facts is None or request.get('const') or semantics != self._semantics:
+            control = self._get_control(semantics, request.get('const', ()))
+            if request.get('program'):
+                control.add(request['program'])
+            control.parse()
+        else:
+            control = self._control
+        for atom in externals:
+            if not control.is_external(atom):
+                raise ValueError(f'{atom} is not an external atom')
+        if control is self._control:
+            externals.extend(facts)
+
+        control.max_models = request.get('models', 1)
+        for atom in externals:
+            control.assign_external(atom, True)
+        try:
+            yield from control.solve()
+        finally:
+            for atom in externals:
+                control.assign_external(atom, False)
+
+    def _get_external_facts(self, program):
+        # programs made of facts over externals of the knowledge base use the warm control
+        if not program:
+            return []
+        statements = []
+        clingo.parse_program(program, statements.append)
+        facts = []
+        for statement in statements:
+            if statement.type == clingo.ast.ASTType.Program:
+                continue
+            if statement.type != clingo.ast.ASTType.Rule or statement.body \
+                    or statement.head.type != clingo.ast.ASTType.Literal \
+                    or statement.head.sign != clingo.ast.Sign.NoSign \
+                    or statement.head.atom.type != clingo.ast.ASTType.SymbolicAtom:
+                return None
+            try:
+                fact = clingo.parse_term(str(statement.head.atom.term))
+            except RuntimeError:
+                return None
+            if not self._control.is_external(fact):
+                return None
+            facts.append(fact)
+        return facts
+
+    def _get_control(self, semantics, constants=()):
+        control = eclingo.Control(semantics=semantics, optimization=self._optimization)
+        for file_path in self._input_files:
+            control.load(file_path)
+        for constant in [*self._constants, *constants]:
+            name, term = constant.split('=')
+            control.add_const(name, term)
+        return control
+
+    @staticmethod
+    def _write(output_stream, response):
+        output_stream.write(json.dumps(response) + '\n')
+        output_stream.flush()
+
+
+class _SocketWriter:
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, text):
+        self._wfile.write(text.encode('utf-8'))
+
+    def flush(self):
+        self._wfile.flush()
+
+
+def main(arguments=None):
+    argparser = argparse.ArgumentParser(prog='eclingo serve')
+    argparser.add_argument('-k', '--k15', action='store_true',
+                           help='computes world views under K15 semantics')
+    argparser.add_argument('-op', '--optimization', type=int,
+                           help='optimization level (0 to 5, see eclingo --help)',
+                           default=eclingo.__optimization__)
+    argparser.add_argument('-c', '--const', action='append', default=[],
+                           help='adds a constant to the program (using \'<name>=<term>\' format)')
+    argparser.add_argument('--socket', type=str,
+                           help='serves queries on a unix socket instead of stdin')
+    argparser.add_argument('input_files', nargs='+', type=str, help='path to input files')
+    args = argparser.parse_args(arguments)
+
+    server = Server(args.input_files, args.k15, args.optimization, args.const)
+
+    if args.socket is None:
+        server.serve(sys.stdin, sys.stdout)
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    server.handle(line.decode('utf-8'), _SocketWriter(self.wfile))
+
+    if os.path.lexists(args.socket):
+        if not stat.S_ISSOCK(os.lstat(args.socket).st_mode):
+            argparser.error(f'{args.socket} exists and is not a socket')
+        os.remove(args.socket)
+    with socketserver.UnixStreamServer(args.socket, Handler) as socket_server:
+        try:
+            socket_server.serve_forever()
+        finally:
+            os.remove(args.socket)
@@ -0,0 +1,80 @@
+import asyncio
+import queue
+import threading
+
+
+_DONE = object()
+
+
+class SolveHandle:
+
+    def __init__(self, control, models, on_model=None):
+        self._control = control
+        self._source = models
+        self._on_model = on_model
+        self._models = queue.Queue()
+        self._finished = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for model in self._source:
+                if self._on_model is not None:
+                    self._on_model(model)
+                else:
+                    self._models.put(model)
+        except (RuntimeError, ValueError, OSError) as error:
+            self._error = error
+        finally:
+            self._finished.set()
+            self._models.put(_DONE)
+
+    def cancel(self):
+        if not self._finished.is_set():
+            self._control.interrupt()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def get(self):
+        self.wait()
+        if self._error is not None:
+            raise self._error
+        if self._control.interrupted:
+            return 'INTERRUPTED'
+        if self._control.optimal:
+            return 'OPTIMUM FOUND'
+        return 'SATISFIABLE' if self._control.models else 'UNSATISFIABLE'
+
+    def _next(self):
+        model = self._models.get()
+        if model is _DONE:
+            self._models.put(_DONE)
+        return model
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        model = self._next()
+        if model is _DONE:
+            raise StopIteration
+        return model
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        model = await asyncio.get_event_loop().run_in_executor(None, self._next)
+        if model is _DONE:
+            raise StopAsyncIteration
+        return model
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cancel()
+        self.wait()
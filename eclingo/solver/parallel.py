@@ -0,0 +1,134 @@
+from collections import deque
+import multiprocessing
+import clingo
+from eclingo.solver.solver import Solver
+
+
+_POLL_INTERVAL = 0.1
+
+_worker = {}
+
+
+def _init_worker(sources, semantics, optimization, externals, epistemic_symbols,
+                 show_symbols):
+    # errors are reported by the tests, as a failing initializer makes the pool respawn workers
+    from eclingo.main import Control
+
+    try:
+        control = Control(semantics=semantics, optimization=optimization)
+        for kind, source in sources:
+            if kind == 'file':
+                control.load(source)
+            else:
+                control.add(source)
+        control.parse()
+        for atom, truth in externals:
+            control.assign_external(clingo.parse_term(atom), truth)
+
+        # the index of the main process may be ordered differently, for instance when it was
+        # restored from a ground cache, so candidates are tested in the order of its symbols
+        epistemic_index = _align(control.epistemic_index, epistemic_symbols,
+                                 lambda epistemic: epistemic.symbol)
+        show_atoms = _align(control.show_atoms, show_symbols, lambda show_atom: show_atom[0]) \
+            if show_symbols is not None else None
+    except (RuntimeError, ValueError, OSError) as error:
+        _worker['error'] = error
+        return
+
+    _worker['control'] = control
+    _worker['epistemic_index'] = epistemic_index
+    _worker['solver'] = control.get_test_solver(epistemic_index, show_atoms)
+
+
+def _align(items, symbols, get_symbol):
+    positions = {str(get_symbol(item)): item for item in items}
+    try:
+        return [positions[symbol] for symbol in symbols]
+    except KeyError as error:
+        raise RuntimeError(f'worker did not ground the atom {error}') from None
+
+
+def _test_worker(values):
+    if 'error' in _worker:
+        raise _worker['error']
+    solver = _worker['solver']
+    epistemic_index = _worker['epistemic_index']
+    assumptions = [(epistemic.symbol, value)
+                   for epistemic, value in zip(epistemic_index, values)]
+    failed = solver.test(assumptions)
+    if failed is None:
+        return None, solver.get_consequences(assumptions)
+    return epistemic_index.index(failed), None
+
+
+class ParallelSolver(Solver):
+
+    def __init__(self, candidates_gen, candidates_test, epistemic_index, max_models,
+                 epistemic_dependencies, show_atoms, statistics, workers, ordered, worker_args):
+        super().__init__(candidates_gen, candidates_test, epistemic_index, max_models,
+                         epistemic_dependencies, show_atoms, statistics)
+        self._workers = workers
+        self._ordered = ordered
+        self._worker_args = worker_args
+        self._nogoods = []
+
+    def _search(self, symbols):
+        pool = multiprocessing.Pool(self._workers, initializer=_init_worker,
+                                    initargs=self._worker_args)
+        pending = deque()
+        try:
+            with self._solve(self._candidates_gen) as candidates_gen_handle:
+                for model in self._statistics.iterate(candidates_gen_handle, 'candidates'):
+                    if self.interrupted:
+                        break
+                    self._statistics.increment('candidates')
+                    for nogood in self._nogoods:
+                        model.context.add_nogood(nogood)
+                    self._nogoods = []
+
+                    assumptions = self._get_assumptions(model)
+                    values = [value for _, value in assumptions]
+                    pending.append((pool.apply_async(_test_worker, (values,)),
+                                    self._get_symbols(model) if symbols else None,
+                                    assumptions))
+
+                    yield from self._collect(pending, len(pending) >= 2 * self._workers)
+                    if self.models == self._max_models or self.interrupted:
+                        break
+                else:
+                    self._is_interrupted(candidates_gen_handle)
+
+            while pending and self.models != self._max_models and not self.interrupted:
+                yield from self._collect(pending, True)
+        finally:
+            pool.terminate()
+
+    def _collect(self, pending, block):
+        while pending and self.models != self._max_models:
+            position = self._get_ready(pending, block)
+            if position is None or self.interrupted:
+                return
+            result, symbols, assumptions = pending[position]
+            del pending[position]
+            block = False
+
+            with self._statistics.phase('workers'):
+                failed, consequences = result.get()
+            if failed is None:
+                self._count_world_view()
+                yield (symbols, assumptions, self._get_show_symbols(consequences)) \
+                    if symbols is not None else None
+            else:
+                failed = self._epistemic_index[failed]
+                self._count_rejected(failed)
+                if self._epistemic_dependencies is not None:
+                    self._nogoods.append(self._get_nogood(failed, assumptions))
+
+    def _get_ready(self, pending, block):
+        if block:
+            while not pending[0][0].ready() and not self.interrupted:
+                pending[0][0].wait(_POLL_INTERVAL)
+        if self._ordered:
+            return 0 if pending[0][0].ready() else None
+        return next((position for position, (result, _, _) in enumerate(pending)
+                     if result.ready()), None)
@@ -0,0 +1,75 @@
+from math import ceil
+from eclingo.utils.statistics import Statistics
+
+
+_MAX_CHECKED = 1 << 16
+
+
+class EpistemicPropagator:
+
+    def __init__(self, candidates_test, epistemic_index, threshold, statistics=None):
+        self._candidates_test = candidates_test
+        self._epistemic_index = epistemic_index
+        self._threshold = max(1, ceil(threshold * len(epistemic_index)))
+        self._statistics = statistics if statistics is not None else Statistics()
+        self._literals = []
+        self._checked = {}
+
+    def init(self, init):
+        self._checked = {}
+        self._literals = [init.solver_literal(epistemic.literal)
+                          for epistemic in self._epistemic_index]
+        for literal in set(self._literals):
+            init.add_watch(literal)
+            init.add_watch(-literal)
+
+    def propagate(self, control, _changes):
+        values = tuple(control.assignment.value(literal) for literal in self._literals)
+        if sum(value is not None for value in values) < self._threshold:
+            return
+
+        if values not in self._checked:
+            if len(self._checked) >= _MAX_CHECKED:
+                self._checked.clear()
+            self._checked[values] = self._check(values)
+        if not self._checked[values]:
+            return
+
+        self._statistics.increment('propagator_conflicts')
+        clause = [-literal if value else literal
+                  for literal, value in zip(self._literals, values) if value is not None]
+        if control.add_clause(clause, tag=True):
+            control.propagate()
+
+    def _check(self, values):
+        assumptions = [(epistemic.symbol, value)
+                       for epistemic, value in zip(self._epistemic_index, values)
+                       if value is not None]
+        with self._statistics.phase('propagator'):
+            self._statistics.increment('propagator_checks')
+            brave = self._get_consequences('brave', assumptions)
+            if brave is None:
+                return True
+            cautious = self._get_consequences('cautious', assumptions)
+
+        for epistemic, value in zip(self._epistemic_index, values):
+            if value is None:
+                continue
+            if value != epistemic.negated and epistemic.objective_literal not in brave:
+                return True
+            if value == epistemic.negated and epistemic.objective_literal in cautious:
+                return True
+        return False
+
+    def _get_consequences(self, enum_mode, assumptions):
+        self._candidates_test.configuration.solve.enum_mode = enum_mode
+        consequences_model = None
+        with self._candidates_test.solve(yield_=True, assumptions=assumptions) \
+                as candidates_test_handle:
+            for consequences_model in candidates_test_handle:
+                pass
+            if consequences_model is None:
+                return None
+            return {epistemic.objective_literal for epistemic in self._epistemic_index
+                    if epistemic.objective_literal is not None
+                    and consequences_model.is_true(epistemic.objective_literal)}
@@ -1,72 +1,281 @@
+from contextlib import contextmanager
+import clingo
+from eclingo.utils.statistics import Statistics
+
+
 class Solver:
 
-    def __init__(self, candidates_gen, candidates_test, epistemic_atoms, max_models):
+    def __init__(self, candidates_gen, candidates_test, epistemic_index, max_models,
+                 epistemic_dependencies=None, show_atoms=None, statistics=None, cost_atoms=None):
         self.models = 0
+        self.cost = None
+        self.optimal = False
         self._candidates_gen = candidates_gen
         self._candidates_test = candidates_test
-        self._epistemic_atoms = epistemic_atoms
+        self._epistemic_index = epistemic_index
         self._max_models = max_models
+        self._epistemic_dependencies = epistemic_dependencies
+        self._show_atoms = show_atoms
+        self._consequences = None
+        self._statistics = statistics if statistics is not None else Statistics()
+        self._levels = {}
+        for weight, priority, literal in cost_atoms or ():
+            self._levels.setdefault(priority, []).append((literal, weight))
+        self._levels = sorted(self._levels.items(), reverse=True)
+        self._blocked = []
+        self._bound_assumptions = []
+        self._solving = None
+        self.interrupted = False
+
+    def interrupt(self):
+        # an interrupt sent to an idle control would stop its next solve call instead
+        self.interrupted = True
+        solving = self._solving
+        if solving is not None:
+            solving.interrupt()
+
+    @contextmanager
+    def _solve(self, control, assumptions=()):
+        solving, self._solving = self._solving, control
+        try:
+            with control.solve(yield_=True, assumptions=assumptions) as handle:
+                yield handle
+        finally:
+            self._solving = solving
+
+    def _is_interrupted(self, handle):
+        if handle.get().interrupted:
+            self.interrupted = True
+        return self.interrupted
 
     def solve(self):
-        with self._candidates_gen.solve(yield_=True) as candidates_gen_handle:
-            for model in candidates_gen_handle:
-                k_lits = set()
-                k_not_lits = set()
-                not_k_lits = set()
-                not_k_not_lits = set()
-                for epistemic in self._epistemic_atoms:
-                    if epistemic in model.symbols(shown=True):
-                        if 'aux_not_' in epistemic.name:
-                            k_not_lits.add(epistemic)
+        return self._search(True)
+
+    def count(self):
+        for _ in self._search(False):
+            pass
+        return self.models
+
+    def _search(self, symbols):
+        try:
+            while True:
+                cost = None
+                with self._solve(self._candidates_gen, self._bound_assumptions) \
+                        as candidates_gen_handle:
+                    for model in self._statistics.iterate(candidates_gen_handle, 'candidates'):
+                        if self.interrupted:
+                            break
+                        self._statistics.increment('candidates')
+                        assumptions = self._get_assumptions(model)
+                        failed = self.test(assumptions)
+                        if self.interrupted:
+                            break
+
+                        if failed is None:
+                            consequences = self.get_consequences(assumptions)
+                            if self.interrupted:
+                                break
+                            self._count_world_view()
+                            if self._levels:
+                                cost = self.cost = self._get_cost(model)
+                            if symbols:
+                                yield self._get_symbols(model), assumptions, \
+                                    self._get_show_symbols(consequences)
+                            else:
+                                yield None
+
+                            if self._levels or self.models == self._max_models:
+                                break
                         else:
-                            k_lits.add(epistemic)
+                            self._count_rejected(failed)
+                            nogood = None
+                            if self._epistemic_dependencies is not None:
+                                nogood = self._get_nogood(failed, assumptions)
+                                model.context.add_nogood(nogood)
+                            if self._levels:
+                                self._blocked.append(nogood if nogood is not None else assumptions)
                     else:
-                        if 'aux_not_' in epistemic.name:
-                            not_k_not_lits.add(epistemic)
-                        else:
-                            not_k_lits.add(epistemic)
-                assumptions = [(atom, True) for atom in k_lits | k_not_lits] + \
-                              [(atom, False) for atom in not_k_lits | not_k_not_lits]
-                test = True
-                if k_lits | not_k_lits:
-                    self._candidates_test.configuration.solve.enum_mode = 'cautious'
-                    with self._candidates_test.solve(yield_=True, assumptions=assumptions) \
-                            as candidates_test_handle:
-                        cautious_model = None
-                        for cautious_model in candidates_test_handle:
-                            for epistemic in k_lits:
-                                atom = self._epistemic_atoms.get(epistemic)
-                                if atom not in cautious_model.symbols(atoms=True):
-                                    test = False
-                                    break
-                        if test and cautious_model:
-                            for epistemic in not_k_lits:
-                                atom = self._epistemic_atoms.get(epistemic)
-                                if atom in cautious_model.symbols(atoms=True):
-                                    test = False
-                                    break
-
-                if test and (k_not_lits | not_k_not_lits):
-                    self._candidates_test.configuration.solve.enum_mode = 'brave'
-                    with self._candidates_test.solve(yield_=True, assumptions=assumptions) \
-                            as candidates_test_handle:
-                        brave_model = None
-                        for brave_model in candidates_test_handle:
-                            for epistemic in k_not_lits:
-                                atom = self._epistemic_atoms.get(epistemic)
-                                if atom in brave_model.symbols(atoms=True):
-                                    test = False
-                                    break
-                        if test and brave_model:
-                            for epistemic in not_k_not_lits:
-                                atom = self._epistemic_atoms.get(epistemic)
-                                if atom not in brave_model.symbols(atoms=True):
-                                    test = False
-                                    break
-
-                if test:
-                    self.models += 1
-                    yield model.symbols(shown=True), assumptions
-
-                    if self.models == self._max_models:
-                        break
+                        self._is_interrupted(candidates_gen_handle)
+
+                if not self._levels or self.interrupted:
+                    return
+                if cost is None:
+                    self.optimal = self.models > 0
+                    return
+                self._statistics.increment('bound_restarts')
+                self._add_bound(cost)
+        finally:
+            self._release_bound()
+
+    def test(self, assumptions):
+        self._consequences = None
+        k_lits = []
+        k_not_lits = []
+        not_k_lits = []
+        not_k_not_lits = []
+        for epistemic, (_, value) in zip(self._epistemic_index, assumptions):
+            if epistemic.negated:
+                (k_not_lits if value else not_k_not_lits).append(epistemic)
+            else:
+                (k_lits if value else not_k_lits).append(epistemic)
+
+        with self._statistics.phase('cautious'):
+            failed = self._test_cautious(assumptions, k_lits, not_k_lits)
+        if failed is None and not self.interrupted:
+            with self._statistics.phase('brave'):
+                failed = self._test_brave(assumptions, k_not_lits, not_k_not_lits)
+        return failed
+
+    def get_consequences(self, assumptions):
+        if self._show_atoms is None:
+            return None
+        if self._consequences is None:
+            with self._statistics.phase('consequences'):
+                self._candidates_test.configuration.solve.enum_mode = 'cautious'
+                with self._solve(self._candidates_test, assumptions) as candidates_test_handle:
+                    cautious_model = None
+                    for cautious_model in candidates_test_handle:
+                        pass
+                    if cautious_model and not self._is_interrupted(candidates_test_handle):
+                        self._set_consequences(cautious_model)
+        return self._consequences
+
+    def _count_world_view(self):
+        self.models += 1
+        self._statistics.increment('world_views')
+        if self.models == 1:
+            self._statistics.set('candidates_to_first_world_view',
+                                 self._statistics.counters.get('candidates', 0))
+
+    def _count_rejected(self, failed):
+        self._statistics.increment('rejected_brave' if failed.negated else 'rejected_cautious')
+
+    def _set_consequences(self, cautious_model):
+        if self._show_atoms is not None:
+            self._consequences = [index for index, (_, literal) in enumerate(self._show_atoms)
+                                  if cautious_model.is_true(literal)]
+
+    def _get_symbols(self, model):
+        return model.symbols(shown=True)
+
+    def _get_show_symbols(self, consequences):
+        if consequences is None:
+            return None
+        return [self._show_atoms[index][0] for index in consequences]
+
+    def _get_assumptions(self, model):
+        return [(epistemic.symbol, model.is_true(epistemic.literal))
+                for epistemic in self._epistemic_index]
+
+    def _test_cautious(self, assumptions, k_lits, not_k_lits):
+        if not (k_lits or not_k_lits):
+            return None
+
+        self._statistics.increment('cautious_checks')
+        self._candidates_test.configuration.solve.enum_mode = 'cautious'
+        with self._solve(self._candidates_test, assumptions) as candidates_test_handle:
+            cautious_model = None
+            for cautious_model in candidates_test_handle:
+                failed = next((epistemic for epistemic in k_lits
+                               if not self._holds(cautious_model, epistemic)), None)
+                if failed is not None:
+                    candidates_test_handle.cancel()
+                    self._statistics.increment('early_exits')
+                    return failed
+                not_k_lits = [epistemic for epistemic in not_k_lits
+                              if self._holds(cautious_model, epistemic)]
+                if not (k_lits or not_k_lits or self._show_atoms is not None):
+                    candidates_test_handle.cancel()
+                    self._statistics.increment('early_exits')
+                    return None
+
+            if self._is_interrupted(candidates_test_handle) or cautious_model is None:
+                return None
+            failed = next(iter(not_k_lits), None)
+            if failed is None:
+                self._set_consequences(cautious_model)
+        return failed
+
+    def _test_brave(self, assumptions, k_not_lits, not_k_not_lits):
+        if not (k_not_lits or not_k_not_lits):
+            return None
+
+        self._statistics.increment('brave_checks')
+        self._candidates_test.configuration.solve.enum_mode = 'brave'
+        with self._solve(self._candidates_test, assumptions) as candidates_test_handle:
+            brave_model = None
+            for brave_model in candidates_test_handle:
+                failed = next((epistemic for epistemic in k_not_lits
+                               if self._holds(brave_model, epistemic)), None)
+                if failed is not None:
+                    candidates_test_handle.cancel()
+                    self._statistics.increment('early_exits')
+                    return failed
+                not_k_not_lits = [epistemic for epistemic in not_k_not_lits
+                                  if not self._holds(brave_model, epistemic)]
+                if not (k_not_lits or not_k_not_lits):
+                    candidates_test_handle.cancel()
+                    self._statistics.increment('early_exits')
+                    return None
+
+            if self._is_interrupted(candidates_test_handle) or brave_model is None:
+                return None
+        return next(iter(not_k_not_lits), None)
+
+    def _get_cost(self, model):
+        return tuple(sum(weight for literal, weight in elements if model.is_true(literal))
+                     for _, elements in self._levels)
+
+    def _add_bound(self, cost):
+        literals = {epistemic.symbol: epistemic.literal for epistemic in self._epistemic_index}
+        with self._candidates_gen.backend() as backend:
+            if not self._bound_assumptions:
+                activation = backend.add_atom()
+                backend.add_external(activation, clingo.TruthValue.False_)
+                self._bound_assumptions = [activation]
+            activation = self._bound_assumptions[0]
+            worse = None
+            for (_, elements), bound in reversed(list(zip(self._levels, cost))):
+                at_least = self._add_weight_atom(backend, elements, bound)
+                if worse is None:
+                    worse = at_least
+                    continue
+                above = self._add_weight_atom(backend, elements, bound + 1)
+                level_worse = backend.add_atom()
+                backend.add_rule([level_worse], [above])
+                backend.add_rule([level_worse], [at_least, -above, worse])
+                worse = level_worse
+            backend.add_rule([], [worse, activation])
+
+            for nogood in self._blocked:
+                backend.add_rule([], [activation, *(literals[symbol] if value else -literals[symbol]
+                                                    for symbol, value in nogood)])
+        self._blocked = []
+
+    def _release_bound(self):
+        self._blocked = []
+        if self._bound_assumptions:
+            with self._candidates_gen.backend() as backend:
+                backend.add_external(self._bound_assumptions[0], clingo.TruthValue.Release)
+            self._bound_assumptions = []
+
+    @staticmethod
+    def _add_weight_atom(backend, elements, bound):
+        atom = backend.add_atom()
+        lower = bound - sum(weight for _, weight in elements if weight < 0)
+        backend.add_weight_rule([atom], lower,
+                                [(literal, weight) if weight > 0 else (-literal, -weight)
+                                 for literal, weight in elements if weight])
+        return atom
+
+    def _get_nogood(self, failed, assumptions):
+        values = dict(assumptions)
+        nogood = {(failed.symbol, values[failed.symbol])}
+        nogood.update((symbol, values[symbol])
+                      for symbol in self._epistemic_dependencies[failed.symbol])
+        return list(nogood)
+
+    @staticmethod
+    def _holds(model, epistemic):
+        return epistemic.objective_literal is not None \
+            and model.is_true(epistemic.objective_literal)
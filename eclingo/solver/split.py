@@ -0,0 +1,139 @@
+from eclingo.solver.solver import Solver
+
+
+_END = object()
+
+
+class SplitSolver(Solver):
+
+    def __init__(self, candidates_test, components, rest_show_atoms, max_models,
+                 epistemic_dependencies=None, show_atoms=None, statistics=None):
+        super().__init__(None, candidates_test, [], max_models, None,
+                         rest_show_atoms if show_atoms is not None else None, statistics)
+        self._solvers = [_ComponentSolver(candidates_gen, candidates_test, epistemic_index, 0,
+                                          epistemic_dependencies,
+                                          component_show_atoms if show_atoms is not None
+                                          else None, self._statistics)
+                         for candidates_gen, epistemic_index, component_show_atoms in components]
+
+    def interrupt(self):
+        super().interrupt()
+        for solver in self._solvers:
+            solver.interrupt()
+
+    def solve(self):
+        rest = self._solve_rest()
+        if rest is None or self.interrupted:
+            return
+
+        streams = [_Memoized(solver.solve()) for solver in self._solvers]
+        try:
+            if not all(stream.has_items() for stream in streams) or self.interrupted:
+                return
+            for world_views in self._product(streams):
+                if self.interrupted:
+                    break
+                symbols = [symbol for world_view in world_views for symbol in world_view[0]]
+                assumptions = [assumption for world_view in world_views
+                               for assumption in world_view[1]]
+                consequences = None
+                if self._show_atoms is not None:
+                    consequences = list(rest)
+                    consequences.extend(symbol for world_view in world_views
+                                        for symbol in world_view[2])
+                self._count_world_view()
+                yield symbols, assumptions, consequences
+
+                if self.models == self._max_models:
+                    break
+        finally:
+            for stream in streams:
+                stream.close()
+
+    def count(self):
+        if self._solve_rest() is None or self.interrupted:
+            return 0
+
+        models = 1
+        for solver in self._solvers:
+            models *= solver.count(self._max_models)
+            if not models or self.interrupted:
+                break
+        self.models = min(models, self._max_models) if self._max_models else models
+        self._statistics.set('world_views', self.models)
+        return self.models
+
+    def _solve_rest(self):
+        with self._statistics.phase('consequences'):
+            self._candidates_test.configuration.solve.enum_mode = 'cautious'
+            with self._solve(self._candidates_test) as candidates_test_handle:
+                cautious_model = None
+                for cautious_model in candidates_test_handle:
+                    pass
+                if self._is_interrupted(candidates_test_handle) or cautious_model is None:
+                    return None
+                self._set_consequences(cautious_model)
+        return self._get_show_symbols(self._consequences) or []
+
+    @staticmethod
+    def _product(streams):
+        # odometer over the memoized streams, the last component changes fastest
+        iterators = [iter(stream) for stream in streams]
+        world_views = [next(iterator) for iterator in iterators]
+        while True:
+            yield list(world_views)
+            position = len(streams) - 1
+            while position >= 0:
+                world_view = next(iterators[position], _END)
+                if world_view is not _END:
+                    world_views[position] = world_view
+                    break
+                iterators[position] = iter(streams[position])
+                world_views[position] = next(iterators[position])
+                position -= 1
+            if position < 0:
+                return
+
+
+class _ComponentSolver(Solver):
+
+    def count(self, max_models=0):
+        # a component with max_models world views already reaches the limit of the product
+        self._max_models = max_models
+        return super().count()
+
+    def _get_symbols(self, model):
+        return [epistemic.symbol for epistemic in self._epistemic_index
+                if model.is_true(epistemic.literal)]
+
+    def _count_world_view(self):
+        self.models += 1
+        self._statistics.increment('component_world_views')
+
+
+class _Memoized:
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self._items = []
+        self._exhausted = False
+
+    def has_items(self):
+        return self._fetch(0)
+
+    def close(self):
+        self._iterator.close()
+
+    def _fetch(self, position):
+        while position >= len(self._items) and not self._exhausted:
+            try:
+                self._items.append(next(self._iterator))
+            except StopIteration:
+                self._exhausted = True
+        return position < len(self._items)
+
+    def __iter__(self):
+        position = 0
+        while self._fetch(position):
+            yield self._items[position]
+            position += 1
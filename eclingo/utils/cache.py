@@ -0,0 +1,113 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import clingo
+from eclingo.parser.observer import ProgramObserver
+from eclingo.postprocessor.postprocessor import Model, Symbol, EpistemicSign
+
+
+class _DiskCache:
+
+    _SUFFIXES = ('.json.gz', '.aspif.gz', '.index.json')
+
+    def __init__(self, path, max_size=1 << 28):
+        self._path = path
+        self._max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+    def _get_entry_path(self, name):
+        return os.path.join(self._path, name)
+
+    def _write(self, name, write, compress=True):
+        temporary_path = None
+        try:
+            descriptor, temporary_path = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+            with os.fdopen(descriptor, 'wb') as raw_entry:
+                if compress:
+                    with gzip.open(raw_entry, 'wt', encoding='utf-8') as entry:
+                        write(entry)
+                else:
+                    with io.TextIOWrapper(raw_entry, encoding='utf-8') as entry:
+                        write(entry)
+            os.replace(temporary_path, self._get_entry_path(name))
+        except OSError:
+            if temporary_path is not None and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return False
+        return True
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self._path):
+            if name.endswith(self._SUFFIXES):
+                try:
+                    status = os.stat(os.path.join(self._path, name))
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, name))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, name in sorted(entries):
+            if size <= self._max_size:
+                break
+            try:
+                os.remove(os.path.join(self._path, name))
+            except OSError:
+                continue
+            size -= entry_size
+
+
+class ResultCache(_DiskCache):
+
+    def get(self, key):
+        entry_path = self._get_entry_path(f'{key}.json.gz')
+        try:
+            with gzip.open(entry_path, 'rt', encoding='utf-8') as entry:
+                models = [Model([self._load_symbol(symbol) for symbol in symbols])
+                          for symbols in json.load(entry)]
+            os.utime(entry_path)
+        except (OSError, ValueError, KeyError, TypeError, RuntimeError):
+            return None
+        return models
+
+    def put(self, key, models):
+        models = [[self._dump_symbol(symbol) for symbol in model.symbols] for model in models]
+        if self._write(f'{key}.json.gz',
+                       lambda entry: json.dump(models, entry, separators=(',', ':'))):
+            self._evict()
+
+    @staticmethod
+    def _dump_symbol(symbol):
+        return [symbol.name, [str(argument) for argument in symbol.arguments],
+                not symbol.sign, int(symbol.epistemic_sign)]
+
+    @staticmethod
+    def _load_symbol(symbol):
+        name, arguments, positive, sign = symbol
+        return Symbol(name, [clingo.parse_term(argument) for argument in arguments], positive,
+                      EpistemicSign(sign))
+
+
+class GroundCache(_DiskCache):
+
+    def get(self, key):
+        index_path = self._get_entry_path(f'{key}.index.json')
+        program_path = self._get_entry_path(f'{key}.aspif.gz')
+        try:
+            with open(index_path, 'r', encoding='utf-8') as entry:
+                index = json.load(entry)
+            with gzip.open(program_path, 'rt', encoding='utf-8') as entry:
+                program, symbols = ProgramObserver.read_aspif(entry)
+            os.utime(index_path)
+            os.utime(program_path)
+        except (OSError, ValueError, IndexError, RuntimeError):
+            return None
+        return program, symbols, index
+
+    def put(self, key, program, symbols, index):
+        if self._write(f'{key}.aspif.gz', lambda entry: program.write_aspif(entry, symbols)) \
+                and self._write(f'{key}.index.json', lambda entry: json.dump(index, entry),
+                                compress=False):
+            self._evict()
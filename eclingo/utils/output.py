@@ -0,0 +1,117 @@
+import json
+import clingo
+from eclingo.postprocessor.postprocessor import EpistemicSign
+
+
+class Writer:
+
+    def begin(self):
+        pass
+
+    def solving(self):
+        pass
+
+    def model(self, number, model, cost=None):
+        pass
+
+    def count(self, models):
+        pass
+
+    def end(self, status, models, elapsed):
+        pass
+
+
+class TextWriter(Writer):
+
+    def __init__(self, stream, version):
+        self._stream = stream
+        self._version = version
+        self._prefixes = {}
+
+    def begin(self):
+        self._stream.write(f'eclingo version {self._version}\n')
+
+    def solving(self):
+        self._stream.write('Solving...\n')
+        self._stream.flush()
+
+    def model(self, number, model, cost=None):
+        self._stream.write(f'Answer: {number}\n{" ".join(map(self._format, model.symbols))}\n')
+        if cost is not None:
+            self._stream.write(f'Optimization: {" ".join(map(str, cost))}\n')
+
+    def count(self, models):
+        self._stream.write(f'World views: {models}\n')
+
+    def end(self, status, models, elapsed):
+        self._stream.write(f'{status}\n\nElapsed time: {elapsed:.6f} s\n')
+        self._stream.flush()
+
+    def _format(self, symbol):
+        key = (symbol.sign, symbol.epistemic_sign, symbol.name)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = self._prefixes[key] = \
+                f'{symbol.sign}&k{{ {symbol.epistemic_sign}{symbol.name}'
+        if symbol.arguments:
+            return f'{prefix}({", ".join(map(str, symbol.arguments))}) }}'
+        return f'{prefix} }}'
+
+
+class JsonWriter(Writer):
+
+    def __init__(self, stream, _version):
+        self._stream = stream
+
+    def model(self, number, model, cost=None):
+        line = {'answer': number, 'world_view': list(map(self._get_atom, model.symbols))}
+        if cost is not None:
+            line['cost'] = list(cost)
+        self._stream.write(json.dumps(line) + '\n')
+
+    def end(self, status, models, elapsed):
+        self._stream.write(json.dumps({'result': status, 'models': models, 'time': elapsed})
+                           + '\n')
+        self._stream.flush()
+
+    @staticmethod
+    def _get_atom(symbol):
+        return {'name': symbol.name,
+                'arguments': [argument.number if argument.type == clingo.SymbolType.Number
+                              else str(argument) for argument in symbol.arguments],
+                'default_negation': bool(symbol.sign),
+                'negation': symbol.epistemic_sign in (EpistemicSign.BothNegations,
+                                                      EpistemicSign.Negation),
+                'strong_negation': symbol.epistemic_sign in (EpistemicSign.BothNegations,
+                                                             EpistemicSign.StrongNegation)}
+
+
+class CompactWriter(Writer):
+
+    def __init__(self, stream, _version):
+        self._stream = stream
+        self._predicates = {}
+
+    def model(self, number, model, cost=None):
+        atoms = []
+        for symbol in model.symbols:
+            key = (symbol.sign, symbol.epistemic_sign, symbol.name, len(symbol.arguments))
+            predicate = self._predicates.get(key)
+            if predicate is None:
+                predicate = self._predicates[key] = len(self._predicates)
+                self._stream.write(f'p {predicate} {symbol.sign}{symbol.epistemic_sign}'
+                                   f'{symbol.name}/{len(symbol.arguments)}\n')
+            if symbol.arguments:
+                atoms.append(f'{predicate}({",".join(map(str, symbol.arguments))})')
+            else:
+                atoms.append(str(predicate))
+        self._stream.write(f'w {number} {" ".join(atoms)}\n')
+        if cost is not None:
+            self._stream.write(f'o {number} {" ".join(map(str, cost))}\n')
+
+    def end(self, status, models, elapsed):
+        self._stream.write(f's {status.replace(" ", "_")} {models} {elapsed:.6f}\n')
+        self._stream.flush()
+
+
+WRITERS = {'text': TextWriter, 'json': JsonWriter, 'compact': CompactWriter}
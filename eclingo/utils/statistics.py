@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from time import perf_counter, process_time
+
+
+class Statistics:
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        wall = perf_counter()
+        cpu = process_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - wall, process_time() - cpu)
+
+    def iterate(self, iterable, name):
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_time(self, name, wall, cpu):
+        times = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+        times['wall'] += wall
+        times['cpu'] += cpu
+
+    def increment(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        self.counters[name] = value
+
+    def to_dict(self):
+        return {'phases': {name: dict(times) for name, times in self.phases.items()},
+                'counters': dict(self.counters)}
@@ -39,6 +39,8 @@ setup(
         'eclingo.parser',
         'eclingo.solver',
         'eclingo.postprocessor',
+        'eclingo.server',
+        'eclingo.batch',
         'eclingo.utils'
     ],
     entry_points={
@@ -1,4 +1,8 @@
+import json
 import eclingo.main as eclingo
+from eclingo.batch.batch import solve_instance
+from eclingo.utils.cache import GroundCache, ResultCache
+from eclingo.solver.split import SplitSolver, _Memoized
 
 
 INPUT_PROG_PATH = 'test/prog/input/'
@@ -96,3 +100,260 @@ def test_yale_g91():
                 sol = output_prog.read()
                 sol = sol.replace('\n', '').replace(' ', '')
             assert result == sol
+
+
+def test_yale_g91_learning():
+    for i in range(1, 9):
+        if i != 6:
+            eclingo_control = eclingo.Control(max_models=0,
+                                              semantics=False,
+                                              optimization=4)
+            input_path = INPUT_YALE_PATH + f'yale{i:02d}.lp'
+            eclingo_control.load(KB_YALE_PATH)
+            eclingo_control.load(input_path)
+            eclingo_control.add_const('length', str(i))
+            eclingo_control.parse()
+            result = [sorted(model.symbols) for model in eclingo_control.solve()]
+            result = str(sorted(result)).replace(' ', '')
+            with open(OUTPUT_YALE_PATH + f'sol_yale{i:02d}.txt', 'r') as output_prog:
+                sol = output_prog.read()
+                sol = sol.replace('\n', '').replace(' ', '')
+            assert result == sol
+
+
+def test_prog_g91_async():
+    for i in range(1, 8):
+        eclingo_control = eclingo.Control(max_models=0,
+                                          semantics=False,
+                                          optimization=eclingo.__optimization__)
+        input_path = INPUT_PROG_PATH + f'prog{i:02d}.lp'
+        eclingo_control.load(input_path)
+        eclingo_control.parse()
+        handle = eclingo_control.solve_async()
+        result = [sorted(model.symbols) for model in handle]
+        result = str(sorted(result)).replace(' ', '')
+        with open(OUTPUT_PROG_PATH + f'sol{i:02d}.txt', 'r') as output_prog:
+            sol = output_prog.read()
+            sol = sol.replace('\n', '').replace(' ', '')
+        assert result == sol
+        assert handle.get() == ('SATISFIABLE' if eclingo_control.models else 'UNSATISFIABLE')
+
+
+def test_eligible_g91_heuristic():
+    for heuristic in ['false', 'brave']:
+        for i in range(1, 17):
+            eclingo_control = eclingo.Control(max_models=0,
+                                              semantics=False,
+                                              optimization=eclingo.__optimization__,
+                                              heuristic=heuristic)
+            input_path = INPUT_ELIGIBLE_PATH + f'eligible{i:02d}.lp'
+            eclingo_control.load(KB_ELIGIBLE_PATH)
+            eclingo_control.load(input_path)
+            eclingo_control.parse()
+            result = [sorted(model.symbols) for model in eclingo_control.solve()]
+            result = str(sorted(result)).replace(' ', '')
+            with open(OUTPUT_ELIGIBLE_PATH + f'sol_eligible{i:02d}.txt', 'r') as output_prog:
+                sol = output_prog.read()
+                sol = sol.replace('\n', '').replace(' ', '')
+            assert result == sol
+
+
+def test_prog_g91_cache(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for i in range(1, 8):
+        results = []
+        for _ in range(2):
+            eclingo_control = eclingo.Control(max_models=0,
+                                              semantics=False,
+                                              optimization=eclingo.__optimization__,
+                                              cache=cache)
+            input_path = INPUT_PROG_PATH + f'prog{i:02d}.lp'
+            eclingo_control.load(input_path)
+            eclingo_control.parse()
+            result = [sorted(model.symbols) for model in eclingo_control.solve()]
+            results.append(str(sorted(result)).replace(' ', ''))
+        with open(OUTPUT_PROG_PATH + f'sol{i:02d}.txt', 'r') as output_prog:
+            sol = output_prog.read()
+            sol = sol.replace('\n', '').replace(' ', '')
+        assert results == [sol, sol]
+        assert eclingo_control.statistics['counters']['cache_hits'] == 1
+
+
+def test_eligible_g91_split():
+    for i in range(1, 17):
+        eclingo_control = eclingo.Control(max_models=0,
+                                          semantics=False,
+                                          optimization=eclingo.__optimization__,
+                                          split=True)
+        input_path = INPUT_ELIGIBLE_PATH + f'eligible{i:02d}.lp'
+        eclingo_control.load(KB_ELIGIBLE_PATH)
+        eclingo_control.load(input_path)
+        eclingo_control.parse()
+        result = [sorted(model.symbols) for model in eclingo_control.solve()]
+        result = str(sorted(result)).replace(' ', '')
+        with open(OUTPUT_ELIGIBLE_PATH + f'sol_eligible{i:02d}.txt', 'r') as output_prog:
+            sol = output_prog.read()
+            sol = sol.replace('\n', '').replace(' ', '')
+        assert result == sol
+
+
+def test_eligible_k15_consequences():
+    for i in range(1, 17):
+        eclingo_control = eclingo.Control(max_models=0,
+                                          semantics=True,
+                                          optimization=5)
+        input_path = INPUT_ELIGIBLE_PATH + f'eligible{i:02d}.lp'
+        eclingo_control.load(KB_ELIGIBLE_PATH)
+        eclingo_control.load(input_path)
+        eclingo_control.parse()
+        result = [sorted(model.symbols) for model in eclingo_control.solve()]
+        result = str(sorted(result)).replace(' ', '')
+        with open(OUTPUT_ELIGIBLE_PATH + f'sol_eligible{i:02d}.txt', 'r') as output_prog:
+            sol = output_prog.read()
+            sol = sol.replace('\n', '').replace(' ', '')
+        assert result == sol
+
+
+def test_yale_g91_propagator():
+    for i in range(1, 9):
+        if i != 6:
+            eclingo_control = eclingo.Control(max_models=0,
+                                              semantics=False,
+                                              optimization=eclingo.__optimization__,
+                                              propagator_threshold=0.5)
+            input_path = INPUT_YALE_PATH + f'yale{i:02d}.lp'
+            eclingo_control.load(KB_YALE_PATH)
+            eclingo_control.load(input_path)
+            eclingo_control.add_const('length', str(i))
+            eclingo_control.parse()
+            result = [sorted(model.symbols) for model in eclingo_control.solve()]
+            result = str(sorted(result)).replace(' ', '')
+            with open(OUTPUT_YALE_PATH + f'sol_yale{i:02d}.txt', 'r') as output_prog:
+                sol = output_prog.read()
+                sol = sol.replace('\n', '').replace(' ', '')
+            assert result == sol
+
+
+def test_yale_g91_ground_cache(tmp_path):
+    ground_cache = GroundCache(str(tmp_path))
+    for i in range(1, 9):
+        if i != 6:
+            results = []
+            for _ in range(2):
+                eclingo_control = eclingo.Control(max_models=0,
+                                                  semantics=False,
+                                                  optimization=5,
+                                                  ground_cache=ground_cache)
+                input_path = INPUT_YALE_PATH + f'yale{i:02d}.lp'
+                eclingo_control.load(KB_YALE_PATH)
+                eclingo_control.load(input_path)
+                eclingo_control.add_const('length', str(i))
+                eclingo_control.parse()
+                result = [sorted(model.symbols) for model in eclingo_control.solve()]
+                results.append(str(sorted(result)).replace(' ', ''))
+            with open(OUTPUT_YALE_PATH + f'sol_yale{i:02d}.txt', 'r') as output_prog:
+                sol = output_prog.read()
+                sol = sol.replace('\n', '').replace(' ', '')
+            assert results == [sol, sol]
+            assert eclingo_control.statistics['counters']['ground_cache_hits'] == 1
+
+
+def test_yale_g91_count():
+    for i in range(1, 9):
+        if i != 6:
+            eclingo_control = eclingo.Control(max_models=0,
+                                              semantics=False,
+                                              optimization=eclingo.__optimization__)
+            input_path = INPUT_YALE_PATH + f'yale{i:02d}.lp'
+            eclingo_control.load(KB_YALE_PATH)
+            eclingo_control.load(input_path)
+            eclingo_control.add_const('length', str(i))
+            eclingo_control.parse()
+            with open(OUTPUT_YALE_PATH + f'sol_yale{i:02d}.txt', 'r') as output_prog:
+                sol = output_prog.read()
+            assert eclingo_control.count() == sol.count('[') - 1
+
+
+def test_prog_g91_optimization():
+    for weak_constraint, optimum in ((':~ &k{ a }. [1]', '&k{ b }'),
+                                     (':~ &k{ b }. [1]', '&k{ a }')):
+        eclingo_control = eclingo.Control(semantics=False,
+                                          optimization=eclingo.__optimization__)
+        eclingo_control.load(INPUT_PROG_PATH + 'prog02.lp')
+        eclingo_control.add(weak_constraint)
+        eclingo_control.parse()
+        result = [str(model) for model in eclingo_control.solve()]
+        assert result[-1] == optimum
+        assert eclingo_control.optimal
+        assert eclingo_control.cost == (0,)
+
+
+def test_prog_g91_optimization_repeated():
+    eclingo_control = eclingo.Control(semantics=False,
+                                      optimization=eclingo.__optimization__)
+    eclingo_control.load(INPUT_PROG_PATH + 'prog02.lp')
+    eclingo_control.add(':~ &k{ a }. [1]')
+    eclingo_control.parse()
+    for _ in range(2):
+        result = [str(model) for model in eclingo_control.solve()]
+        assert result[-1] == '&k{ b }'
+        assert eclingo_control.optimal
+        assert eclingo_control.cost == (0,)
+
+
+def test_yale_g91_workers():
+    for ordered in (True, False):
+        for i in range(1, 9):
+            if i != 6:
+                eclingo_control = eclingo.Control(max_models=0,
+                                                  semantics=False,
+                                                  optimization=eclingo.__optimization__,
+                                                  workers=2,
+                                                  ordered=ordered)
+                input_path = INPUT_YALE_PATH + f'yale{i:02d}.lp'
+                eclingo_control.load(KB_YALE_PATH)
+                eclingo_control.load(input_path)
+                eclingo_control.add_const('length', str(i))
+                eclingo_control.parse()
+                result = [sorted(model.symbols) for model in eclingo_control.solve()]
+                result = str(sorted(result)).replace(' ', '')
+                with open(OUTPUT_YALE_PATH + f'sol_yale{i:02d}.txt', 'r') as output_prog:
+                    sol = output_prog.read()
+                    sol = sol.replace('\n', '').replace(' ', '')
+                assert result == sol
+
+
+def test_split_product():
+    streams = [_Memoized(iter([(i, 0), (i, 1)] if i < 3 else [(i, 0)])) for i in range(2000)]
+    world_views = list(SplitSolver._product(streams))
+    assert len(world_views) == 8
+    assert [world_view[i][1] for world_view in world_views for i in range(3)] \
+        == [bit for number in range(8) for bit in (number >> 2, number >> 1 & 1, number & 1)]
+    assert all(len(world_view) == 2000 for world_view in world_views)
+
+
+def test_batch_eligible():
+    for i in range(1, 17):
+        input_path = INPUT_ELIGIBLE_PATH + f'eligible{i:02d}.lp'
+        eclingo_control = eclingo.Control(max_models=0,
+                                          semantics=False,
+                                          optimization=eclingo.__optimization__)
+        eclingo_control.load(KB_ELIGIBLE_PATH)
+        eclingo_control.load(input_path)
+        eclingo_control.parse()
+        expected = sorted(sorted(str(symbol) for symbol in model.symbols)
+                          for model in eclingo_control.solve())
+
+        response = json.loads(json.dumps(solve_instance(
+            (input_path, [KB_ELIGIBLE_PATH], [], False, eclingo.__optimization__, 0, None))))
+        assert sorted(response) == ['instance', 'models', 'result', 'time']
+        assert response['instance'] == input_path
+        assert response['result'] == ('SATISFIABLE' if expected else 'UNSATISFIABLE')
+        assert sorted(sorted(model) for model in response['models']) == expected
+        assert response['time'] >= 0
+
+
+def test_batch_error():
+    response = solve_instance(('test/eligible/input/missing.lp', [KB_ELIGIBLE_PATH], [], False,
+                               eclingo.__optimization__, 0, None))
+    assert sorted(response) == ['error', 'instance', 'time']
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import clingo
+import eclingo.main as eclingo
+from eclingo.postprocessor.postprocessor import Symbol
+from eclingo.postprocessor.postprocessor import EpistemicSign
+from eclingo.server.server import Server
+
+
+class TestMultiShotG91(unittest.TestCase):
+
+    def setUp(self):
+        self.eclingo_control = eclingo.Control(max_models=0,
+                                               semantics=False,
+                                               optimization=eclingo.__optimization__)
+        self.eclingo_control.add("""#external q.
+        p :- q.
+        :- not &k{ p }.
+        """)
+        self.eclingo_control.parse()
+
+    def test_query(self):
+        self.eclingo_control.assign_external(clingo.Function('q'), True)
+        result = [sorted(model.symbols) for model in self.eclingo_control.solve()]
+        self.assertEqual(result, [[Symbol('p', [], True, EpistemicSign.NoSign)]])
+
+    def test_retract_query(self):
+        self.eclingo_control.assign_external(clingo.Function('q'), True)
+        list(self.eclingo_control.solve())
+        self.eclingo_control.assign_external(clingo.Function('q'), False)
+        result = [sorted(model.symbols) for model in self.eclingo_control.solve()]
+        self.assertEqual(result, [])
+
+
+class TestMultiShotPropagator(unittest.TestCase):
+
+    def test_flip_external(self):
+        eclingo_control = eclingo.Control(max_models=0,
+                                          semantics=False,
+                                          optimization=0,
+                                          propagator_threshold=0.0)
+        eclingo_control.add("""#external q.
+        p :- q.
+        r :- &k{ p }.
+        """)
+        eclingo_control.parse()
+        eclingo_control.assign_external(clingo.Function('q'), False)
+        result = [sorted(model.symbols) for model in eclingo_control.solve()]
+        self.assertEqual(result, [[]])
+        eclingo_control.assign_external(clingo.Function('q'), True)
+        result = [sorted(model.symbols) for model in eclingo_control.solve()]
+        self.assertEqual(result, [[Symbol('p', [], True, EpistemicSign.NoSign)]])
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.lp', delete=False) as kb_file:
+            kb_file.write('#external q.\np :- q.\n:- not &k{ p }.\n')
+        self.addCleanup(os.remove, kb_file.name)
+        self.server = Server([kb_file.name])
+
+    def query(self, request):
+        output = io.StringIO()
+        self.server.handle(request, output)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_external_facts(self):
+        responses = self.query('{"id": 1, "program": "q."}')
+        self.assertEqual(responses[-1]['result'], 'SATISFIABLE')
+        responses = self.query('{"id": 2}')
+        self.assertEqual(responses[-1]['result'], 'UNSATISFIABLE')
+
+    def test_externals(self):
+        self.assertEqual(self.query('{"id": 4, "externals": ["q"]}')[-1]['result'],
+                         'SATISFIABLE')
+        self.assertIn('error', self.query('{"id": 5, "externals": ["p"]}')[0])
+        self.assertIn('error', self.query('{"id": 6, "externals": ["r"]}')[0])
+        self.assertEqual(self.query('{"id": 7}')[-1]['result'], 'UNSATISFIABLE')
+
+    def test_invalid_query(self):
+        self.assertIn('error', self.query('[1]')[0])
+        self.assertEqual(self.query('{"id": 3, "program": "p."}')[-1]['result'],
+                         'SATISFIABLE')
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import json
+import unittest
+from unittest import mock
+import clingo
+from eclingo.__main__ import main
+from eclingo.postprocessor.postprocessor import Model, Symbol, EpistemicSign
+from eclingo.utils.output import TextWriter, JsonWriter, CompactWriter
+
+
+MODEL = Model([Symbol('p', [clingo.Number(1), clingo.Function('a')], True,
+                      EpistemicSign.BothNegations),
+               Symbol('q', [], True, EpistemicSign.NoSign)])
+
+
+class TestWriters(unittest.TestCase):
+
+    def write(self, writer_class):
+        output = io.StringIO()
+        writer = writer_class(output, '0.2.0')
+        writer.begin()
+        writer.solving()
+        writer.model(1, MODEL, (2, 0))
+        writer.end('SATISFIABLE', 1, 0.5)
+        return output.getvalue()
+
+    def test_text(self):
+        self.assertEqual(self.write(TextWriter),
+                         'eclingo version 0.2.0\nSolving...\nAnswer: 1\n'
+                         '&k{ ~ -p(1, a) } &k{ q }\nOptimization: 2 0\n'
+                         'SATISFIABLE\n\nElapsed time: 0.500000 s\n')
+
+    def test_json(self):
+        lines = [json.loads(line) for line in self.write(JsonWriter).splitlines()]
+        self.assertEqual(lines, [
+            {'answer': 1, 'cost': [2, 0], 'world_view': [
+                {'name': 'p', 'arguments': [1, 'a'], 'default_negation': False,
+                 'negation': True, 'strong_negation': True},
+                {'name': 'q', 'arguments': [], 'default_negation': False,
+                 'negation': False, 'strong_negation': False}]},
+            {'result': 'SATISFIABLE', 'models': 1, 'time': 0.5}])
+
+    def test_compact(self):
+        self.assertEqual(self.write(CompactWriter),
+                         'p 0 ~ -p/2\np 1 q/0\nw 1 0(1,a) 1\no 1 2 0\n'
+                         's SATISFIABLE 1 0.500000\n')
+
+
+class TestOutputFormat(unittest.TestCase):
+
+    def run_main(self, *arguments):
+        output = io.StringIO()
+        with mock.patch('sys.argv', ['eclingo', *arguments]), \
+                contextlib.redirect_stdout(output):
+            main()
+        return output.getvalue().splitlines()
+
+    def test_json(self):
+        lines = [json.loads(line) for line in
+                 self.run_main('test/prog/input/prog02.lp', '-n', '0', '--outf=json',
+                               '--stats=json')]
+        world_views = sorted(atom['name'] for line in lines[:2]
+                             for atom in line['world_view'])
+        self.assertEqual(world_views, ['a', 'b'])
+        self.assertEqual(lines[2]['result'], 'SATISFIABLE')
+        self.assertEqual(lines[2]['models'], 2)
+        self.assertIn('phases', lines[3]['statistics'])
+
+    def test_compact(self):
+        lines = self.run_main('test/prog/input/prog02.lp', '-n', '0', '--outf=compact')
+        self.assertEqual(len([line for line in lines if line.startswith('w ')]), 2)
+        self.assertTrue(lines[-1].startswith('s SATISFIABLE 2 '))
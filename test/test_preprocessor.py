@@ -0,0 +1,34 @@
+import io
+import unittest
+from eclingo.preprocessor.preprocessor import _read_chunks
+
+
+class TestReadChunks(unittest.TestCase):
+
+    def read_chunks(self, program, chunk_size=1):
+        chunks = list(_read_chunks(io.StringIO(program), chunk_size))
+        self.assertEqual(''.join(chunk for _, chunk in chunks), program)
+        for offset, chunk in chunks:
+            self.assertEqual(program.count('\n', 0, program.index(chunk)), offset)
+        return [chunk for _, chunk in chunks]
+
+    def test_statements(self):
+        self.assertEqual(self.read_chunks('a.\nb :- a.\nc.\n'),
+                         ['a.\n', 'b :- a.\n', 'c.\n'])
+
+    def test_size(self):
+        self.assertEqual(self.read_chunks('a.\nb.\nc.\nd.\n', 6), ['a.\nb.\n', 'c.\nd.\n'])
+
+    def test_unfinished_statement(self):
+        self.assertEqual(self.read_chunks('a :-\nb.\nc.\n'), ['a :-\nb.\n', 'c.\n'])
+
+    def test_interval(self):
+        self.assertEqual(self.read_chunks('p(1..\n3).\nq.\n'), ['p(1..\n3).\n', 'q.\n'])
+
+    def test_comments(self):
+        self.assertEqual(self.read_chunks('a. % b.\nc.\n'), ['a. % b.\nc.\n'])
+        self.assertEqual(self.read_chunks('%* a.\nb.\n*%\nc.\n'), ['%* a.\nb.\n*%\nc.\n'])
+        self.assertEqual(self.read_chunks('%* a. *% b.\nc.\n'), ['%* a. *% b.\nc.\n'])
+
+    def test_strings(self):
+        self.assertEqual(self.read_chunks('a("x.\ny").\nb.\n'), ['a("x.\ny").\nb.\n'])
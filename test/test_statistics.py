@@ -0,0 +1,93 @@
+import contextlib
+import io
+import json
+import unittest
+from unittest import mock
+import eclingo.main as eclingo
+from eclingo.__main__ import main
+from eclingo.utils.statistics import Statistics
+
+
+PROG_PATH = 'test/prog/input/prog02.lp'
+KB_ELIGIBLE_PATH = 'test/eligible/eligible.lp'
+INPUT_ELIGIBLE_PATH = 'test/eligible/input/eligible14.lp'
+
+
+class TestStatistics(unittest.TestCase):
+
+    def test_phases(self):
+        statistics = Statistics()
+        with statistics.phase('grounding'):
+            pass
+        with statistics.phase('grounding'):
+            pass
+        self.assertEqual(list(statistics.iterate([1, 2], 'candidates')), [1, 2])
+        phases = statistics.to_dict()['phases']
+        self.assertEqual(sorted(phases), ['candidates', 'grounding'])
+        self.assertTrue(all(times['wall'] >= 0 and times['cpu'] >= 0
+                            for times in phases.values()))
+
+    def test_counters(self):
+        statistics = Statistics()
+        statistics.increment('candidates')
+        statistics.increment('candidates', 2)
+        statistics.set('world_views', 1)
+        self.assertEqual(statistics.to_dict()['counters'], {'candidates': 3, 'world_views': 1})
+
+
+class TestControlStatistics(unittest.TestCase):
+
+    def solve(self, optimization, *paths):
+        eclingo_control = eclingo.Control(max_models=0, semantics=False,
+                                          optimization=optimization)
+        for path in paths:
+            eclingo_control.load(path)
+        eclingo_control.parse()
+        models = len(list(eclingo_control.solve()))
+        return models, eclingo_control.statistics
+
+    def test_counters(self):
+        models, statistics = self.solve(0, PROG_PATH)
+        counters = statistics['counters']
+        self.assertEqual(counters['world_views'], models)
+        self.assertEqual(counters['candidates'],
+                         models + counters.get('rejected_cautious', 0)
+                         + counters.get('rejected_brave', 0))
+        self.assertGreater(counters['epistemic_atoms'], 0)
+        self.assertGreater(counters['ground_atoms'], 0)
+        self.assertGreater(counters['ground_statements'], 0)
+        for phase in ['preprocessing', 'grounding', 'choice_rules', 'candidates',
+                      'postprocessing']:
+            self.assertIn(phase, statistics['phases'])
+        self.assertNotIn('wfm', statistics['phases'])
+        self.assertEqual(sorted(statistics['clingo']), ['generator', 'test'])
+
+    def test_wfm(self):
+        _, statistics = self.solve(3, KB_ELIGIBLE_PATH, INPUT_ELIGIBLE_PATH)
+        self.assertIn('wfm', statistics['phases'])
+        self.assertGreaterEqual(statistics['counters']['wfm_iterations'], 1)
+        self.assertIn('wfm_fixed_atoms', statistics['counters'])
+
+
+class TestStatisticsOutput(unittest.TestCase):
+
+    def run_main(self, *arguments):
+        output = io.StringIO()
+        with mock.patch('sys.argv', ['eclingo', PROG_PATH, '-n', '0', *arguments]), \
+                contextlib.redirect_stdout(output):
+            main()
+        return output.getvalue().splitlines()
+
+    def test_text(self):
+        lines = self.run_main('--stats')
+        self.assertIn('Phase                Wall (s)      CPU (s)', lines)
+        self.assertTrue(any(line.startswith('grounding ') for line in lines))
+        self.assertIn('world_views             : 2', lines)
+        self.assertIn('Generator', lines)
+        self.assertIn('Test', lines)
+
+    def test_json(self):
+        statistics = json.loads(self.run_main('--stats=json')[-1])['statistics']
+        self.assertIn('grounding', statistics['phases'])
+        self.assertEqual(statistics['counters']['world_views'], 2)
+        self.assertIn('generator', statistics['clingo'])